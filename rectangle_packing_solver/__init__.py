@@ -12,27 +12,61 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import TYPE_CHECKING, Any, List
+
 from .__version__ import __version__, __version_info__
 
 # Classes
 from .floorplan import Floorplan
 from .problem import Problem
+from .progress import ThrottledProgress, TqdmProgress
 from .sequence_pair import SequencePair
 from .solution import Solution
 
-# Solvers
-from .solver import Solver
+if TYPE_CHECKING:
+    # Caches
+    from .solution_cache import SolutionCache
+
+    # Solvers
+    from .solver import Solver
 
-# Visualizers
-from .visualizer import Visualizer
+    # Visualizers
+    from .visualizer import RenderQueue, Visualizer
+
+# Classes imported when they are accessed first, since their modules import slow dependencies (simanneal,
+# matplotlib, and sqlite3). Short-lived processes which do not use them can import the package quickly.
+_LAZY_IMPORTS = {
+    "SolutionCache": ".solution_cache",
+    "Solver": ".solver",
+    "Visualizer": ".visualizer",
+    "RenderQueue": ".visualizer",
+}
 
 __all__ = [
     "__version__",
     "__version_info__",
     "Floorplan",
     "Problem",
+    "RenderQueue",
     "SequencePair",
     "Solution",
+    "SolutionCache",
     "Solver",
+    "ThrottledProgress",
+    "TqdmProgress",
     "Visualizer",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
@@ -0,0 +1,37 @@
+# Copyright 2022 Kotaro Terada
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .instances import INSTANCE_SET_VERSION, generate_instance, iter_instances
+from .runner import (
+    benchmark_instance,
+    compare_results,
+    format_results,
+    load_results,
+    measure_import_time,
+    run_benchmark,
+    save_results,
+)
+
+__all__ = [
+    "INSTANCE_SET_VERSION",
+    "generate_instance",
+    "iter_instances",
+    "benchmark_instance",
+    "compare_results",
+    "format_results",
+    "load_results",
+    "measure_import_time",
+    "run_benchmark",
+    "save_results",
+]
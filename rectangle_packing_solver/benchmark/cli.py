@@ -0,0 +1,73 @@
+# Copyright 2022 Kotaro Terada
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import sys
+from typing import List, Optional
+
+from .instances import FAMILIES, SIZES
+from .runner import compare_results, format_results, load_results, run_benchmark, save_results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    The entry point of the benchmark.
+    "run" runs the benchmark and writes the results as JSON, and "compare" compares two result files and exits with
+    status 1 if there are regressions.
+    """
+    parser = argparse.ArgumentParser(
+        prog="rectangle-packing-benchmark", description="Benchmark of rectangle-packing-solver."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmark")
+    run_parser.add_argument("--families", nargs="+", choices=list(FAMILIES), help="instance families (default: all)")
+    run_parser.add_argument("--sizes", nargs="+", type=int, help=f"numbers of rectangles (default: {SIZES})")
+    run_parser.add_argument("--minutes", type=float, default=0.05, help="annealing minutes per instance")
+    run_parser.add_argument("--seed", type=int, default=0, help="random seed")
+    run_parser.add_argument("-o", "--output", help="path of the result file (default: stdout)")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline", help="path of the baseline result file")
+    compare_parser.add_argument("current", help="path of the current result file")
+    compare_parser.add_argument("--throughput-tolerance", type=float, default=0.1)
+    compare_parser.add_argument("--memory-tolerance", type=float, default=0.1)
+    compare_parser.add_argument("--quality-tolerance", type=float, default=0.02)
+    compare_parser.add_argument("--startup-tolerance", type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_benchmark(
+            families=args.families, sizes=args.sizes, minutes=args.minutes, seed=args.seed, log=sys.stderr
+        )
+        if args.output:
+            save_results(results, args.output)
+        else:
+            sys.stdout.write(format_results(results))
+        return 0
+
+    regressions = compare_results(
+        load_results(args.baseline),
+        load_results(args.current),
+        throughput_tolerance=args.throughput_tolerance,
+        memory_tolerance=args.memory_tolerance,
+        quality_tolerance=args.quality_tolerance,
+        startup_tolerance=args.startup_tolerance,
+    )
+    for r in regressions:
+        print(f"REGRESSION {r['instance']} {r['metric']}: {r['baseline']} -> {r['current']} ({r['change']:+.1%})")
+    if not regressions:
+        print("No regressions.")
+    return 1 if regressions else 0
@@ -0,0 +1,88 @@
+# Copyright 2022 Kotaro Terada
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..problem import Problem
+
+# The version of the instance sets. The instances of the same version are always the same, so it must be bumped
+# whenever the generators or the sizes are changed.
+INSTANCE_SET_VERSION = "1"
+
+SIZES = [10, 50, 200, 1000, 2000]
+
+
+def _random(rng: random.Random) -> Tuple[int, int]:
+    return (rng.randint(1, 100), rng.randint(1, 100))
+
+
+def _near_square(rng: random.Random) -> Tuple[int, int]:
+    side = rng.randint(40, 60)
+    return (side, round(side * rng.uniform(0.9, 1.1)))
+
+
+def _slender(rng: random.Random) -> Tuple[int, int]:
+    short = rng.randint(1, 10)
+    long = round(short * rng.uniform(5.0, 20.0))
+    return (short, long) if rng.randint(0, 1) == 0 else (long, short)
+
+
+FAMILIES: Dict[str, Optional[Callable[[random.Random], Tuple[int, int]]]] = {
+    "random": _random,
+    "near-square": _near_square,
+    "slender": _slender,
+    "many-duplicates": None,  # A few shapes of the random family are repeated
+}
+
+
+def generate_instance(family: str, n: int) -> Problem:
+    """
+    Generates the instance of a family with n rectangles, which are all rotatable.
+    The random generator is seeded by the version, the family, and n, so that the instance is always the same.
+    """
+    if family not in FAMILIES:
+        raise ValueError(f"'family' must be either of {list(FAMILIES)}.")
+    if (not isinstance(n, int)) or (n < 1):
+        raise ValueError("'n' must be a positive integer.")
+
+    rng = random.Random(zlib.crc32(f"{INSTANCE_SET_VERSION}:{family}:{n}".encode("utf-8")))
+    generator = FAMILIES[family]
+    if generator is None:
+        shapes = [_random(rng) for _ in range(5)]
+        rectangles = [rng.choice(shapes) for _ in range(n)]
+    else:
+        rectangles = [generator(rng) for _ in range(n)]
+    return Problem.from_arrays(
+        widths=[w for w, _ in rectangles], heights=[h for _, h in rectangles], rotatable=[True] * n
+    )
+
+
+def instance_name(family: str, n: int) -> str:
+    """
+    The name of an instance, e.g., "random-200".
+    """
+    return f"{family}-{n}"
+
+
+def iter_instances(
+    families: Optional[List[str]] = None, sizes: Optional[List[int]] = None
+) -> Iterator[Tuple[str, Problem]]:
+    """
+    Generates the instances of the given families and sizes (all of them by default) with their names.
+    """
+    for family in FAMILIES if families is None else families:
+        for n in SIZES if sizes is None else sizes:
+            yield (instance_name(family, n), generate_instance(family, n))
@@ -0,0 +1,253 @@
+# Copyright 2022 Kotaro Terada
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from ..__version__ import __version__
+from ..problem import Problem
+from ..sequence_pair import SequencePair
+from ..solver import Solver
+from .instances import INSTANCE_SET_VERSION, iter_instances
+
+# The version of the format of the result files
+RESULT_FORMAT_VERSION = 1
+
+# Metrics of an instance, and whether a larger value is better
+METRICS = {
+    "decode_per_sec": True,
+    "steps_per_sec": True,
+    "peak_memory_bytes": False,
+    "area_ratio": False,
+}
+
+# Metrics of the startup of a process, which are smaller the better
+STARTUP_METRICS = ["import_seconds"]
+
+
+def measure_decode(problem: Problem, seed: int = 0, min_seconds: float = 0.2, min_calls: int = 3) -> float:
+    """
+    Measures the decode calls per second of random sequence-pairs of a problem.
+    """
+    rng = random.Random(seed)
+    n = problem.n
+    pairs = [(rng.sample(range(n), k=n), rng.sample(range(n), k=n)) for _ in range(8)]
+    rotations = [0] * n
+
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        gp, gn = pairs[calls % len(pairs)]
+        SequencePair(pair=(gp, gn)).decode(problem=problem, rotations=rotations)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if (min_calls <= calls) and (min_seconds <= elapsed):
+            return calls / elapsed
+
+
+def measure_import_time(module: str = "rectangle_packing_solver", repeats: int = 5) -> float:
+    """
+    Measures the time (in seconds) to import a module in a fresh Python process, as the minimum of repeats.
+    """
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env["PYTHONPATH"] = os.pathsep.join([root] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else []))
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+    times = []
+    for _ in range(repeats):
+        process = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True)
+        times.append(float(process.stdout))
+    return min(times)
+
+
+def measure_peak_memory(problem: Problem, seed: int = 0, max_evaluations: int = 50) -> int:
+    """
+    Measures the peak memory (in bytes) allocated by a short solve of a problem, which is stopped after
+    max_evaluations evaluations, with tracemalloc.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    elif hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+        tracemalloc.reset_peak()
+    try:
+        Solver().solve(problem=problem, simanneal_minutes=1.0, seed=seed, max_evaluations=max_evaluations)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return peak
+
+
+def benchmark_instance(problem: Problem, minutes: float = 0.05, seed: int = 0) -> Dict[str, Any]:
+    """
+    Benchmarks the solver with a problem, and returns the metrics: decode calls per second, annealing steps per
+    second, the peak memory, and the area of the solution relative to the sum of the areas of rectangles (the lower
+    bound), with the elapsed time of solving.
+    """
+    Solver.clear_schedule_cache()
+    start = time.perf_counter()
+    solution = Solver().solve(problem=problem, simanneal_minutes=minutes, seed=seed, stats=True)
+    elapsed = time.perf_counter() - start
+
+    assert solution.stats is not None
+    chain = solution.stats["chains"][0]
+    lower_bound = sum([w * h for w, h in zip(problem.widths, problem.heights)])
+    # The steps of the annealing, without the moves sampled in the calibration of the schedule
+    steps = chain["schedule"]["steps"]
+    return {
+        "n": problem.n,
+        "decode_per_sec": _round(measure_decode(problem, seed=seed)),
+        "steps_per_sec": _round(steps / max(chain["annealing_time"], 1e-9)),
+        "peak_memory_bytes": measure_peak_memory(problem, seed=seed),
+        "area_ratio": _round(solution.floorplan.area / lower_bound),
+        "elapsed": _round(elapsed),
+    }
+
+
+def run_benchmark(
+    families: Optional[List[str]] = None,
+    sizes: Optional[List[int]] = None,
+    minutes: float = 0.05,
+    seed: int = 0,
+    log: Any = None,
+) -> Dict[str, Any]:
+    """
+    Runs the benchmark with the instances of the given families and sizes (all of them by default), and returns
+    the results with the time to import the package, the versions, the environment, and the configuration.
+    If log is given (a file object), the result of every instance is written to it.
+    """
+    startup = {"import_seconds": _round(measure_import_time())}
+    if log is not None:
+        print(f"startup: import_seconds={startup['import_seconds']}", file=log, flush=True)
+
+    results: Dict[str, Any] = {}
+    for name, problem in iter_instances(families=families, sizes=sizes):
+        results[name] = benchmark_instance(problem, minutes=minutes, seed=seed)
+        if log is not None:
+            metrics = ", ".join([f"{key}={results[name][key]}" for key in METRICS])
+            print(f"{name}: {metrics}", file=log, flush=True)
+
+    return {
+        "format_version": RESULT_FORMAT_VERSION,
+        "instance_set_version": INSTANCE_SET_VERSION,
+        "package_version": __version__,
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "system": platform.system(),
+        },
+        "config": {"families": families, "sizes": sizes, "minutes": minutes, "seed": seed},
+        "startup": startup,
+        "results": results,
+    }
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    """
+    Formats the results as JSON, with sorted keys and indents to be diffed.
+    """
+    return json.dumps(results, indent=2, sort_keys=True) + "\n"
+
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    """
+    Saves the results as a JSON file.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(format_results(results))
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """
+    Loads the results from a JSON file.
+    """
+    with open(path, encoding="utf-8") as f:
+        results: Dict[str, Any] = json.load(f)
+    if results.get("format_version") != RESULT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported format of the results: {path}")
+    return results
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    throughput_tolerance: float = 0.1,
+    memory_tolerance: float = 0.1,
+    quality_tolerance: float = 0.02,
+    startup_tolerance: float = 0.2,
+) -> List[Dict[str, Any]]:
+    """
+    Compares the results with the baseline, and returns the regressions: the metrics of the instances (or of the
+    startup, as the instance "startup") which are worse than the baseline beyond the relative tolerances.
+    The instances and the metrics which are not in both are ignored.
+    """
+    if baseline["instance_set_version"] != current["instance_set_version"]:
+        raise ValueError("The results must be of the same version of the instance sets.")
+
+    tolerances = {
+        "decode_per_sec": throughput_tolerance,
+        "steps_per_sec": throughput_tolerance,
+        "peak_memory_bytes": memory_tolerance,
+        "area_ratio": quality_tolerance,
+    }
+    regressions = []
+    for metric in STARTUP_METRICS:
+        before = baseline.get("startup", {}).get(metric)
+        after = current.get("startup", {}).get(metric)
+        if (before is None) or (after is None):
+            continue
+        change = _change(before, after)
+        if startup_tolerance < change:
+            regressions.append(
+                {"instance": "startup", "metric": metric, "baseline": before, "current": after, "change": change}
+            )
+
+    for name in sorted(set(baseline["results"]) & set(current["results"])):
+        for metric, larger_is_better in METRICS.items():
+            before = baseline["results"][name].get(metric)
+            after = current["results"][name].get(metric)
+            if (before is None) or (after is None):
+                continue
+            change = _change(before, after)
+            if (larger_is_better and (change < -tolerances[metric])) or (
+                (not larger_is_better) and (tolerances[metric] < change)
+            ):
+                regressions.append(
+                    {"instance": name, "metric": metric, "baseline": before, "current": after, "change": change}
+                )
+    return regressions
+
+
+def _change(before: float, after: float) -> float:
+    """
+    The relative change of a metric from the baseline.
+    """
+    return (after - before) / before if before else 0.0
+
+
+def _round(x: float) -> float:
+    """
+    Rounds a value to 4 significant figures, to make the results readable and their diffs small.
+    """
+    return float(f"{x:.4g}")
@@ -12,22 +12,38 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Dict, List, Tuple, Union
+from typing import Callable, Dict, List, Tuple, Union
 
 
 class Floorplan:
     """
     A class to represent a rectangle packing floorplan.
+    The positions can be given as a function to calculate them, which is called when they are accessed.
     """
 
-    def __init__(self, positions: List[Dict], bounding_box: Tuple, area: Union[int, float] = -1.0) -> None:
-        self.positions = positions
+    def __init__(
+        self,
+        positions: Union[List[Dict], Callable[[], List[Dict]]],
+        bounding_box: Tuple,
+        area: Union[int, float] = -1.0,
+    ) -> None:
+        self._positions = positions
         self.bounding_box = bounding_box
         if 0 < area:
             self.area = area
         else:
             self.area = bounding_box[0] * bounding_box[1]
 
+    @property
+    def positions(self) -> List[Dict]:
+        if callable(self._positions):
+            self._positions = self._positions()
+        return self._positions
+
+    @positions.setter
+    def positions(self, positions: Union[List[Dict], Callable[[], List[Dict]]]) -> None:
+        self._positions = positions
+
     def __repr__(self) -> str:
         s = "Floorplan({"
         s += "'positions': " + str(self.positions) + ", "
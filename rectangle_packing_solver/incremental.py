@@ -0,0 +1,297 @@
+# Copyright 2022 Kotaro Terada
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .problem import Problem
+
+
+class IncrementalDecoder:
+    """
+    An incremental decoder of sequence-pairs for a problem.
+    It keeps the longest-path labels (= the right/top edges of rectangles) of the committed sequence-pair,
+    and re-calculates only the labels which may be changed by a move.
+    """
+
+    def __init__(self, problem: Problem) -> None:
+        self.problem = problem
+        self.n = problem.n
+        self._committed: Optional[Dict[str, Any]] = None
+        self._candidate: Optional[Dict[str, Any]] = None
+
+    def reset(self, gp: List[int], gn: List[int], rotations: List[int]) -> Tuple[Any, Any]:
+        """
+        Decode a sequence-pair from scratch, commit it, and return its bounding box.
+        """
+        n = self.n
+        index_p = [0] * n
+        for index, i in enumerate(gp):
+            index_p[i] = index
+        index_n = [0] * n
+        for index, i in enumerate(gn):
+            index_n[i] = index
+
+        width_wrot = self.problem.widths.tolist()
+        height_wrot = self.problem.heights.tolist()
+        for i in range(n):
+            if rotations[i] % 2 == 1:
+                width_wrot[i], height_wrot[i] = height_wrot[i], width_wrot[i]
+
+        dist_h: List = [0] * n
+        dist_v: List = [0] * n
+        self._propagate(order=gp, key=index_n, weights=width_wrot, dist=dist_h, start=0, dirty=None)
+        self._propagate(order=gp[::-1], key=index_n, weights=height_wrot, dist=dist_v, start=0, dirty=None)
+
+        bounding_box = (max(dist_h, default=0), max(dist_v, default=0))
+        self._candidate = {
+            "gp": gp,
+            "gn": gn,
+            "index_p": index_p,
+            "index_n": index_n,
+            "width": width_wrot,
+            "height": height_wrot,
+            "dist_h": dist_h,
+            "dist_v": dist_v,
+            "bounding_box": bounding_box,
+        }
+        self.commit()
+        return bounding_box
+
+    def evaluate(
+        self,
+        gp: List[int],
+        gn: List[int],
+        rotations: List[int],
+        gp_range: Optional[Tuple[int, int]] = None,
+        gn_range: Optional[Tuple[int, int]] = None,
+        rotated: Iterable[int] = (),
+        width_limit: Optional[float] = None,
+        height_limit: Optional[float] = None,
+    ) -> Tuple[Any, Any]:
+        """
+        Decode a sequence-pair made by a move from the committed one, and return its bounding box.
+        The move is given by the first and last indices changed in G_{+} (gp_range) and G_{-} (gn_range),
+        and the rectangles whose rotations are changed (rotated).
+        The result is kept as a candidate until it is committed.
+        If width_limit (or height_limit) is given, the decoding is aborted as soon as a path exceeds it. Then, the
+        returned width (or height) exceeds the limit but may not be the exact one, the height is returned as infinity
+        when the width is exceeded, and the candidate cannot be committed.
+        """
+        if self._committed is None:
+            return self.reset(gp=gp, gn=gn, rotations=rotations)
+
+        n = self.n
+        committed = self._committed
+        rotated = list(rotated)
+
+        index_p = committed["index_p"]
+        if gp_range is not None:
+            index_p = index_p[:]
+            for index in range(gp_range[0], gp_range[1] + 1):
+                index_p[gp[index]] = index
+        index_n = committed["index_n"]
+        if gn_range is not None:
+            index_n = index_n[:]
+            for index in range(gn_range[0], gn_range[1] + 1):
+                index_n[gn[index]] = index
+
+        width_wrot = committed["width"]
+        height_wrot = committed["height"]
+        if rotated:
+            width_wrot = width_wrot[:]
+            height_wrot = height_wrot[:]
+            for i in rotated:
+                if rotations[i] % 2 == 0:
+                    width_wrot[i] = self.problem.widths[i]
+                    height_wrot[i] = self.problem.heights[i]
+                else:
+                    width_wrot[i] = self.problem.heights[i]
+                    height_wrot[i] = self.problem.widths[i]
+
+        # Dirty rectangles: the ones whose own widths/heights or the sets of possible predecessors are changed
+        dirty_p: Set[int] = set(rotated)
+        if gp_range is not None:
+            dirty_p.update(gp[gp_range[0] : gp_range[1] + 1])
+        dirty_n: Set[int] = set(rotated)
+        if gn_range is not None:
+            dirty_n.update(gn[gn_range[0] : gn_range[1] + 1])
+
+        # Labels of rectangles before the first changed index are kept, in either of the orders of G_{+} or G_{-}.
+        # When both G_{+} and G_{-} are changed, all the labels are re-calculated.
+        first_p = min([index_p[i] for i in rotated] + ([gp_range[0]] if gp_range is not None else [n]))
+        last_p = max([index_p[i] for i in rotated] + ([gp_range[1]] if gp_range is not None else [-1]))
+        first_n = min([index_n[i] for i in rotated] + ([gn_range[0]] if gn_range is not None else [n]))
+
+        dist_h = committed["dist_h"][:]
+        dist_v = committed["dist_v"][:]
+        if gn_range is None and (gp_range is not None or first_n <= first_p):
+            # Horizontal: j is left of i, when j precedes i in both G_{+} and G_{-}
+            exceeded = self._propagate(
+                order=gp, key=index_n, weights=width_wrot, dist=dist_h, start=first_p, dirty=dirty_p, limit=width_limit
+            )
+        elif gp_range is None:
+            exceeded = self._propagate(
+                order=gn, key=index_p, weights=width_wrot, dist=dist_h, start=first_n, dirty=dirty_n, limit=width_limit
+            )
+        else:
+            exceeded = self._propagate(
+                order=gp, key=index_n, weights=width_wrot, dist=dist_h, start=0, dirty=None, limit=width_limit
+            )
+        if exceeded is not None:
+            self._candidate = None
+            return (exceeded, float("inf"))
+
+        if gn_range is None and (gp_range is not None or first_n <= n - 1 - last_p):
+            # Vertical: j is below i, when j follows i in G_{+} and precedes i in G_{-}
+            exceeded = self._propagate(
+                order=gp[::-1],
+                key=index_n,
+                weights=height_wrot,
+                dist=dist_v,
+                start=n - 1 - last_p,
+                dirty=dirty_p,
+                limit=height_limit,
+            )
+        elif gp_range is None:
+            index_p_reversed = [n - 1 - index for index in index_p]
+            exceeded = self._propagate(
+                order=gn,
+                key=index_p_reversed,
+                weights=height_wrot,
+                dist=dist_v,
+                start=first_n,
+                dirty=dirty_n,
+                limit=height_limit,
+            )
+        else:
+            exceeded = self._propagate(
+                order=gp[::-1], key=index_n, weights=height_wrot, dist=dist_v, start=0, dirty=None, limit=height_limit
+            )
+        if exceeded is not None:
+            self._candidate = None
+            return (max(dist_h, default=0), exceeded)
+
+        bounding_box = (max(dist_h, default=0), max(dist_v, default=0))
+        self._candidate = {
+            "gp": gp,
+            "gn": gn,
+            "index_p": index_p,
+            "index_n": index_n,
+            "width": width_wrot,
+            "height": height_wrot,
+            "dist_h": dist_h,
+            "dist_v": dist_v,
+            "bounding_box": bounding_box,
+        }
+        return bounding_box
+
+    def commit(self) -> None:
+        """
+        Commit the last decoded sequence-pair, so that the next moves are evaluated from it.
+        """
+        if self._candidate is None:
+            raise ValueError("No sequence-pair has been decoded completely.")
+        self._committed = self._candidate
+
+    def longest_paths_through(self) -> Tuple[List, List]:
+        """
+        Returns the lengths of the longest horizontal and vertical paths through each rectangle of the committed
+        sequence-pair. When the width (or height) of a rectangle is changed by d, the paths through it are changed by d
+        and the others are kept. The lengths are calculated once for a committed sequence-pair.
+        """
+        if self._committed is None:
+            raise ValueError("No sequence-pair has been decoded.")
+        committed = self._committed
+        if "through" not in committed:
+            n = self.n
+            gp = committed["gp"]
+            index_n = committed["index_n"]
+            index_n_reversed = [n - 1 - index for index in index_n]
+
+            # Longest paths from each rectangle to the right/top edges, visiting rectangles in the reversed orders
+            tail_h: List = [0] * n
+            tail_v: List = [0] * n
+            self._propagate(
+                order=gp[::-1], key=index_n_reversed, weights=committed["width"], dist=tail_h, start=0, dirty=None
+            )
+            self._propagate(
+                order=gp, key=index_n_reversed, weights=committed["height"], dist=tail_v, start=0, dirty=None
+            )
+
+            through_h = [committed["dist_h"][i] + tail_h[i] - committed["width"][i] for i in range(n)]
+            through_v = [committed["dist_v"][i] + tail_v[i] - committed["height"][i] for i in range(n)]
+            committed["through"] = (through_h, through_v)
+        through: Tuple[List, List] = committed["through"]
+        return through
+
+    @classmethod
+    def _propagate(
+        cls,
+        order: List[int],
+        key: List[int],
+        weights: List,
+        dist: List,
+        start: int,
+        dirty: Optional[Set[int]],
+        limit: Optional[float] = None,
+    ) -> Any:
+        """
+        Update the longest paths (dist) of rectangles visiting them in the given order, where j precedes i in the
+        constraint graph when j is visited before i and key[j] < key[i]. The paths of order[:start] are kept.
+        A path is re-calculated only when the rectangle is dirty or may follow a rectangle whose path is changed.
+        If dirty is None, all the paths are re-calculated.
+        If a re-calculated path exceeds the limit, the update is aborted and the length of the path is returned.
+        Otherwise, None is returned.
+        """
+        n = len(order)
+
+        # The Fenwick tree holds the maximum of path lengths over the prefixes of keys (1-indexed)
+        tree: List = [0] * (n + 1)
+        if 0 < start:
+            for i in order[:start]:
+                tree[key[i] + 1] = dist[i]
+            for k in range(1, n + 1):
+                parent = k + (k & -k)
+                if parent <= n and tree[parent] < tree[k]:
+                    tree[parent] = tree[k]
+
+        changed_key = n  # The smallest key of rectangles whose paths are changed
+        for index in range(start, n):
+            i = order[index]
+            key_i = key[i]
+            d = dist[i]
+            if (dirty is None) or (changed_key < key_i) or (i in dirty):
+                # Query the maximum over [0, key_i)
+                k = key_i
+                longest = 0
+                while 0 < k:
+                    if longest < tree[k]:
+                        longest = tree[k]
+                    k &= k - 1
+                d = weights[i] + longest
+                if d != dist[i]:
+                    dist[i] = d
+                    if key_i < changed_key:
+                        changed_key = key_i
+                    if (limit is not None) and (limit < d):
+                        return d
+
+            # Update at key_i
+            k = key_i + 1
+            while k <= n:
+                if tree[k] < d:
+                    tree[k] = d
+                k += k & -k
+
+        return None
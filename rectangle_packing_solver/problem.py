@@ -12,44 +12,128 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Dict, List, Tuple, Union
+import numbers
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 
 class Problem:
     """
     A class to represent a rectangle packing problem.
+    Widths, heights, and rotatable flags of rectangles are held in compact arrays.
     """
 
-    def __init__(self, rectangles: List[Union[Dict, List, Tuple]]) -> None:
-        self.rectangles = []
-        self.n = 0
+    __slots__ = ("n", "widths", "heights", "rotatable", "_integers", "_rectangles")
 
+    def __init__(self, rectangles: List[Union[Dict, List, Tuple]]) -> None:
         if not isinstance(rectangles, list):
             raise TypeError("Invalid argument: 'rectangles' must be a list.")
 
+        widths = []
+        heights = []
+        rotatable = []
         for r in rectangles:
             if isinstance(r, (list, tuple)):
-                self.rectangles.append(
-                    {
-                        "id": self.n,
-                        "width": r[0],
-                        "height": r[1],
-                        "rotatable": r[2] if len(r) >= 3 else False,
-                    }
-                )
+                widths.append(r[0])
+                heights.append(r[1])
+                rotatable.append(r[2] if len(r) >= 3 else False)
             elif isinstance(r, dict):
-                self.rectangles.append(
-                    {
-                        "id": self.n,
-                        "width": r["width"],
-                        "height": r["height"],
-                        "rotatable": r["rotatable"] if "rotatable" in r else False,
-                    }
-                )
+                widths.append(r["width"])
+                heights.append(r["height"])
+                rotatable.append(r["rotatable"] if "rotatable" in r else False)
             else:
                 raise TypeError("A rectangle must be a list, tuple, or dict.")
 
-            self.n += 1
+        self._set_arrays(widths=widths, heights=heights, rotatable=rotatable)
+
+    @classmethod
+    def from_arrays(cls, widths: Iterable, heights: Iterable, rotatable: Optional[Iterable] = None) -> "Problem":
+        """
+        Creates a problem from arrays (e.g., lists or NumPy arrays) of widths, heights, and rotatable flags,
+        without parsing every rectangle. If rotatable is not given, no rectangles are rotatable.
+        """
+        problem = cls.__new__(cls)
+        problem._set_arrays(widths=widths, heights=heights, rotatable=rotatable)
+        return problem
+
+    def _set_arrays(self, widths: Iterable, heights: Iterable, rotatable: Optional[Iterable]) -> None:
+        self.widths, integer_widths = self._numeric_array(widths)
+        self.heights, integer_heights = self._numeric_array(heights)
+        self._integers: Tuple[Optional[array], Optional[array]] = (integer_widths, integer_heights)
+        self.n = len(self.widths)
+        if rotatable is None:
+            self.rotatable = array("B", bytes(self.n))
+        else:
+            self.rotatable = array("B", map(bool, rotatable))
+        self._rectangles: Optional[List[Dict]] = None
+
+        if len(self.heights) != self.n or len(self.rotatable) != self.n:
+            raise ValueError("'widths', 'heights', and 'rotatable' must be the same length.")
+
+    @property
+    def rectangles(self) -> List[Dict]:
+        """
+        Rectangles as a list of dicts, which is built when it is accessed.
+        """
+        if self._rectangles is None:
+            widths, heights = self._dimensions()
+            self._rectangles = [
+                {
+                    "id": i,
+                    "width": widths[i],
+                    "height": heights[i],
+                    "rotatable": bool(self.rotatable[i]),
+                }
+                for i in range(self.n)
+            ]
+        return self._rectangles
+
+    def _dimensions(self) -> Tuple[List, List]:
+        """
+        Returns the widths and heights as lists of the numbers as they are given (see _numeric_array).
+        """
+        return (self._restore(self.widths, self._integers[0]), self._restore(self.heights, self._integers[1]))
+
+    @classmethod
+    def _numeric_array(cls, values: Iterable) -> Tuple[array, Optional[array]]:
+        """
+        Returns an array of integers if all the values are integers, otherwise an array of floats.
+        Mixed integers and floats are held as floats, so the flags of the integers are returned as well (or None if
+        there are no integers held as floats), to restore them.
+        """
+        dtype = getattr(values, "dtype", None)
+        if dtype is not None and dtype.kind in "biuf":
+            # NumPy arrays are copied as buffers
+            result = array("d" if dtype.kind == "f" else "q")
+            result.frombytes(values.astype("float64" if dtype.kind == "f" else "int64").tobytes())  # type: ignore
+            return (result, None)
+        if not isinstance(values, array):
+            values = list(values)
+        try:
+            return (array("q", values), None)
+        except (TypeError, OverflowError):
+            try:
+                result = array("d", values)
+            except TypeError:
+                raise TypeError("A width and height of a rectangle must be a number.") from None
+        integers = array("B", [isinstance(value, numbers.Integral) for value in values])
+        return (result, integers if any(integers) else None)
+
+    @classmethod
+    def _restore(cls, values: array, integers: Optional[array]) -> List:
+        """
+        Returns the values of an array as a list, where the flagged integers held as floats are restored.
+        """
+        if integers is None:
+            return values.tolist()
+        return [int(value) if integer else value for value, integer in zip(values, integers)]
+
+    def __getstate__(self) -> Tuple:
+        return (self.widths, self.heights, self.rotatable, self._integers)
+
+    def __setstate__(self, state: Tuple) -> None:
+        self._set_arrays(widths=state[0], heights=state[1], rotatable=state[2])
+        self._integers = state[3]
 
     def __repr__(self) -> str:
         s = "Problem({"
@@ -0,0 +1,82 @@
+# Copyright 2022 Kotaro Terada
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+from typing import Any, Callable, Optional
+
+# A progress callback is called as progress_callback(step, total, temperature, energy, best_energy)
+ProgressCallback = Callable[[int, int, float, float, float], Any]
+
+
+class ThrottledProgress:
+    """
+    A progress callback forwarding the reports to another callback every every_steps steps and/or every
+    every_seconds seconds, whichever comes first. The first and last steps are always forwarded.
+    """
+
+    def __init__(
+        self, callback: ProgressCallback, every_steps: Optional[int] = None, every_seconds: Optional[float] = None
+    ) -> None:
+        if (every_steps is not None) and (every_steps < 1):
+            raise ValueError("'every_steps' must be a positive integer.")
+        if (every_seconds is not None) and (every_seconds < 0):
+            raise ValueError("'every_seconds' must be a non-negative number.")
+
+        self.callback = callback
+        self.every_steps = every_steps
+        self.every_seconds = every_seconds
+        self._last_step: Optional[int] = None
+        self._last_time: float = 0.0
+
+    def __call__(self, step: int, total: int, temperature: float, energy: float, best_energy: float) -> None:
+        last_step = self._last_step
+        if (last_step is not None) and (last_step < step < total):
+            if (self.every_steps is None) or (step - last_step < self.every_steps):
+                if (self.every_seconds is None) or (time.perf_counter() - self._last_time < self.every_seconds):
+                    return
+        self._last_step = step
+        if self.every_seconds is not None:
+            self._last_time = time.perf_counter()
+        self.callback(step, total, temperature, energy, best_energy)
+
+
+class TqdmProgress:
+    """
+    A progress callback showing a tqdm progress bar, which is closed at the last step.
+    tqdm is imported when the first report is given.
+    """
+
+    def __init__(self, desc: str = "Progress") -> None:
+        self.desc = desc
+        self._bar: Any = None
+        self._step: int = 0
+
+    def __call__(self, step: int, total: int, temperature: float, energy: float, best_energy: float) -> None:
+        if (self._bar is None) or (step < self._step):
+            from tqdm.auto import tqdm
+
+            self.close()
+            self._bar = tqdm(total=total, desc=self.desc)
+            self._step = 0
+        self._bar.update(step - self._step)
+        self._step = step
+        if total <= step:
+            self.close()
+
+    def close(self) -> None:
+        """
+        Close the progress bar.
+        """
+        if self._bar is not None:
+            self._bar.close()
+            self._bar = None
@@ -12,8 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 import graphlib
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from .floorplan import Floorplan
 from .problem import Problem
@@ -44,13 +45,50 @@ class SequencePair:
             raise ValueError("Lists in the pair must be the same length.")
         self.n = len(self.gp)
 
-        self.oblique_grid = self.pair_to_obliquegrid(pair=self.pair)
+        # O(n) check that G_{+} and G_{-} are permutations of the rectangle IDs (from 0 to n-1)
+        ids = set(range(self.n))
+        if (set(self.gp) != ids) or (set(self.gn) != ids):
+            raise ValueError("Lists in the pair must be permutations of the same IDs (from 0 to n-1).")
 
-    def decode(self, problem: Problem, rotations: Optional[List] = None) -> Floorplan:
+        # The oblique grid is an n x n array, so it is built only when it is accessed.
+        self._oblique_grid: Optional[ObliqueGrid] = None
+
+    @property
+    def oblique_grid(self) -> ObliqueGrid:
+        if self._oblique_grid is None:
+            self._oblique_grid = self.pair_to_obliquegrid(pair=self.pair)
+        return self._oblique_grid
+
+    def decode(self, problem: Problem, rotations: Optional[List] = None, decoder: str = "lcs") -> Floorplan:
         """
         Decode:
             Based on the sequence pair and the problem with rotations information, calculate a floorplan
-            (bounding box, area, and rectangle positions).
+            (bounding box, area, and rectangle positions). Rectangle positions are calculated when they are accessed.
+
+            The longest paths are calculated by either of the following decoders:
+            - "lcs": O(n log n) weighted longest common subsequence with a Fenwick tree [Tang et al., DATE 2000].
+            - "graph": O(n^2) longest path on the constraint graphs. This is kept as a reference implementation.
+        """
+
+        width_wrot, height_wrot, dist_h, dist_v = self._decode(problem=problem, rotations=rotations, decoder=decoder)
+        bb_width = max(dist_h)
+        bb_height = max(dist_v)
+
+        positions = functools.partial(self._positions, dist_h, dist_v, width_wrot, height_wrot)
+        return Floorplan(bounding_box=(bb_width, bb_height), positions=positions)
+
+    def bounding_box(self, problem: Problem, rotations: Optional[List] = None, decoder: str = "lcs") -> Tuple:
+        """
+        Calculate only the bounding box (width and height) of the floorplan, without rectangle positions.
+        """
+
+        _, _, dist_h, dist_v = self._decode(problem=problem, rotations=rotations, decoder=decoder)
+        return (max(dist_h), max(dist_v))
+
+    def _decode(self, problem: Problem, rotations: Optional[List], decoder: str) -> Tuple[List, List, List, List]:
+        """
+        Calculate widths and heights dealing with rotations, and the longest paths (= the right/top edges) of
+        rectangles.
         """
 
         if not isinstance(problem, Problem):
@@ -63,24 +101,103 @@ class SequencePair:
             if len(rotations) != self.n:
                 raise ValueError("'rotations' length must be the same as the sequence-pair length.")
 
-        coords = self.oblique_grid.coordinates
-
         # Width and height dealing with rotations
-        width_wrot = []
-        height_wrot = []
-        for i in range(self.n):
-            if (rotations is None) or (rotations[i] % 2 == 0):
-                # no rotation
-                width_wrot.append(problem.rectangles[i]["width"])
-                height_wrot.append(problem.rectangles[i]["height"])
-            else:
-                # with rotation
-                assert problem.rectangles[i]["rotatable"]
-                width_wrot.append(problem.rectangles[i]["height"])
-                height_wrot.append(problem.rectangles[i]["width"])
+        # The numbers in the problem are kept as they are given, even if integers are mixed with floats
+        width_wrot, height_wrot = problem._dimensions()
+        if rotations is not None:
+            for i in range(self.n):
+                if rotations[i] % 2 == 1:
+                    # with rotation
+                    assert problem.rotatable[i]
+                    width_wrot[i], height_wrot[i] = height_wrot[i], width_wrot[i]
+
+        # The longest paths
+        if decoder == "lcs":
+            dist_h, dist_v = self._longest_paths_lcs(width_wrot=width_wrot, height_wrot=height_wrot)
+        elif decoder == "graph":
+            dist_h, dist_v = self._longest_paths_graph(width_wrot=width_wrot, height_wrot=height_wrot)
+        else:
+            raise ValueError("'decoder' must be either of ['lcs', 'graph'].")
+
+        return (width_wrot, height_wrot, dist_h, dist_v)
+
+    @staticmethod
+    def _positions(dist_h: List, dist_v: List, width_wrot: List, height_wrot: List) -> List[Dict]:
+        """
+        Calculate bottom-left positions from the longest paths.
+        """
+        positions = []
+        for i in range(len(dist_h)):
+            positions.append(
+                {
+                    "id": i,
+                    "x": dist_h[i] - width_wrot[i],  # distance from left edge
+                    "y": dist_v[i] - height_wrot[i],  # distande from bottom edge
+                    "width": width_wrot[i],
+                    "height": height_wrot[i],
+                }
+            )
+
+        return positions
+
+    def _longest_paths_lcs(self, width_wrot: List, height_wrot: List) -> Tuple[List, List]:
+        """
+        Calculate the longest paths by the weighted longest common subsequence.
+        The horizontal distance of i is the maximum weight of common subsequences of G_{+} and G_{-} ending at i,
+        which is found by a prefix-maximum query over the indices in G_{-}.
+        """
+        n = self.n
+
+        # Index of each rectangle in G_{-}
+        index_n = [0] * n
+        for index, i in enumerate(self.gn):
+            index_n[i] = index
+
+        # Horizontal: j is left of i, when j precedes i in both G_{+} and G_{-}
+        dist_h = self._prefix_max_paths(order=self.gp, index_n=index_n, weights=width_wrot)
+
+        # Vertical: j is below i, when j follows i in G_{+} and precedes i in G_{-}
+        dist_v = self._prefix_max_paths(order=reversed(self.gp), index_n=index_n, weights=height_wrot)
+
+        return (dist_h, dist_v)
+
+    @classmethod
+    def _prefix_max_paths(cls, order: Iterable[int], index_n: List[int], weights: List) -> List:
+        """
+        Calculate the longest path to each rectangle, visiting rectangles in the given order.
+        The Fenwick tree holds the maximum of path lengths over the prefixes of G_{-}.
+        """
+        n = len(index_n)
+        dist: List = [0] * n
+        tree: List = [0] * (n + 1)  # 1-indexed
+        for i in order:
+            # Query the maximum over [0, index_n[i])
+            k = index_n[i]
+            longest = 0
+            while 0 < k:
+                if longest < tree[k]:
+                    longest = tree[k]
+                k &= k - 1
+            d = weights[i] + longest
+            dist[i] = d
+
+            # Update at index_n[i]
+            k = index_n[i] + 1
+            while k <= n:
+                if tree[k] < d:
+                    tree[k] = d
+                k += k & -k
+
+        return dist
+
+    def _longest_paths_graph(self, width_wrot: List, height_wrot: List) -> Tuple[List, List]:
+        """
+        Calculate the longest paths on the horizontal/vertical constraint graphs.
+        """
+        coords = self.oblique_grid.coordinates
 
         # Calculate the longest path in the "Horizontal Constraint Graph" (G_h)
-        # This time complexity is O(n^2), may be optimized...
+        # This time complexity is O(n^2)
         graph_h: Dict[int, List] = {i: [] for i in range(self.n)}
         for i in range(self.n):
             for j in range(self.n):
@@ -96,10 +213,9 @@ class SequencePair:
         dist_h = [width_wrot[i] for i in range(self.n)]
         for i in torder_h:
             dist_h[i] += max([dist_h[e] for e in graph_h[i]], default=0)
-        bb_width = max(dist_h)
 
         # Calculate the longest path in the "Vertical Constraint Graph" (G_v)
-        # This time complexity is O(n^2), may be optimized...
+        # This time complexity is O(n^2)
         graph_v: Dict[int, List] = {i: [] for i in range(self.n)}
         for i in range(self.n):
             for j in range(self.n):
@@ -115,22 +231,111 @@ class SequencePair:
         dist_v = [height_wrot[i] for i in range(self.n)]
         for i in torder_v:
             dist_v[i] += max([dist_v[e] for e in graph_v[i]], default=0)
-        bb_height = max(dist_v)
 
-        # Calculate bottom-left positions
-        positions = []
-        for i in range(self.n):
-            positions.append(
-                {
-                    "id": i,
-                    "x": dist_h[i] - width_wrot[i],  # distance from left edge
-                    "y": dist_v[i] - height_wrot[i],  # distande from bottom edge
-                    "width": width_wrot[i],
-                    "height": height_wrot[i],
-                }
-            )
+        return (dist_h, dist_v)
 
-        return Floorplan(bounding_box=(bb_width, bb_height), positions=positions)
+    @classmethod
+    def decode_batch(
+        cls,
+        problem: Problem,
+        gp_matrix: Any,
+        gn_matrix: Any,
+        rot_matrix: Any = None,
+        positions: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Decode a batch of sequence-pairs at once.
+            Each row of gp_matrix, gn_matrix, and rot_matrix (array-like of shape (batch, n)) is a G_{+}, G_{-},
+            and rotations, respectively. Returns a dict of NumPy arrays: bounding box "width", "height", and "area"
+            of shape (batch,). With positions=True, it also contains "positions", a dict of "x", "y", "width",
+            and "height" arrays of shape (batch, n) indexed by the rectangle id.
+        """
+        import numpy as np  # NumPy is imported only for the batch decoding
+
+        if not isinstance(problem, Problem):
+            raise TypeError("Invalid argument: 'problem' must be an instance of Problem.")
+
+        gp = np.asarray(gp_matrix, dtype=np.intp)
+        gn = np.asarray(gn_matrix, dtype=np.intp)
+        if gp.ndim != 2 or gp.shape != gn.shape:
+            raise ValueError("'gp_matrix' and 'gn_matrix' must be 2d arrays of the same shape.")
+        batch, n = gp.shape
+        if problem.n != n:
+            raise ValueError("'problem.n' must be the same as the sequence-pair length.")
+
+        # Width and height dealing with rotations
+        widths = np.asarray(problem.widths, dtype=np.float64)
+        heights = np.asarray(problem.heights, dtype=np.float64)
+        width_wrot = np.broadcast_to(widths, (batch, n))
+        height_wrot = np.broadcast_to(heights, (batch, n))
+        if rot_matrix is not None:
+            rotated = np.asarray(rot_matrix) % 2 == 1
+            if rotated.shape != gp.shape:
+                raise ValueError("'rot_matrix' must be the same shape as 'gp_matrix'.")
+            rotatable = np.asarray(problem.rotatable, dtype=bool)
+            if np.any(rotated & ~rotatable):
+                raise ValueError("A rectangle which is not rotatable cannot be rotated.")
+            width_wrot = np.where(rotated, heights, widths)
+            height_wrot = np.where(rotated, widths, heights)
+
+        # Index of each rectangle in G_{-}
+        rows = np.arange(batch)
+        index_n = np.empty_like(gn)
+        np.put_along_axis(index_n, gn, np.broadcast_to(np.arange(n), (batch, n)), axis=1)
+
+        # Horizontal: j is left of i, when j precedes i in both G_{+} and G_{-}
+        dist_h = cls._prefix_max_paths_batch(gp=gp, index_n=index_n, weights=width_wrot, rows=rows, reverse=False)
+
+        # Vertical: j is below i, when j follows i in G_{+} and precedes i in G_{-}
+        dist_v = cls._prefix_max_paths_batch(gp=gp, index_n=index_n, weights=height_wrot, rows=rows, reverse=True)
+
+        bb_width = dist_h.max(axis=1, initial=0.0)
+        bb_height = dist_v.max(axis=1, initial=0.0)
+        result: Dict[str, Any] = {"width": bb_width, "height": bb_height, "area": bb_width * bb_height}
+        if positions:
+            result["positions"] = {
+                "x": dist_h - width_wrot,
+                "y": dist_v - height_wrot,
+                "width": np.array(width_wrot),
+                "height": np.array(height_wrot),
+            }
+
+        return result
+
+    @classmethod
+    def _prefix_max_paths_batch(cls, gp: Any, index_n: Any, weights: Any, rows: Any, reverse: bool) -> Any:
+        """
+        A vectorized version of _prefix_max_paths, which processes a step for all the sequence-pairs at once.
+        The Fenwick trees of the batch are laid out in a flat array.
+        """
+        import numpy as np
+
+        batch, n = gp.shape
+        dist = np.zeros((batch, n), dtype=np.float64)
+        tree = np.zeros(batch * (n + 1), dtype=np.float64)  # 1-indexed, the index 0 of each tree is always 0
+        offsets = rows * (n + 1)
+        for index in reversed(range(n)) if reverse else range(n):
+            i = gp[:, index]
+            key = index_n[rows, i]
+
+            # Query the maximum over [0, index_n[i])
+            k = key.copy()
+            longest = np.zeros(batch, dtype=np.float64)
+            while k.any():
+                np.maximum(longest, tree[offsets + k], out=longest)
+                k &= k - 1
+            d = weights[rows, i] + longest
+            dist[rows, i] = d
+
+            # Update at index_n[i]
+            k = key + 1
+            while k.any():
+                position = offsets + k
+                tree[position] = np.maximum(tree[position], np.where(0 < k, d, 0.0))
+                k += k & -k
+                k[n < k] = 0
+
+        return dist
 
     def encode(self) -> None:
         """
@@ -156,12 +361,12 @@ class SequencePair:
         grid = [[-1 for _ in range(n)] for _ in range(n)]
         coordinates = [{"a": -1, "b": -1} for _ in range(n)]
 
-        # This time complexity is O(n^2), may be optimized...
+        for index_p, i in enumerate(gp):
+            coordinates[i]["a"] = index_p
+        for index_n, i in enumerate(gn):
+            coordinates[i]["b"] = index_n
         for i in range(n):
-            index_p = gp.index(i)
-            index_n = gn.index(i)
-            grid[index_p][index_n] = i
-            coordinates[i] = {"a": index_p, "b": index_n}
+            grid[coordinates[i]["a"]][coordinates[i]["b"]] = i
 
         return ObliqueGrid(grid=grid, coordinates=coordinates)
 
@@ -12,7 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Dict, List, Optional
+
 from .floorplan import Floorplan
+from .problem import Problem
 from .sequence_pair import SequencePair
 
 
@@ -21,7 +24,14 @@ class Solution:
     A class to represent a rectangle packing solution.
     """
 
-    def __init__(self, sequence_pair: SequencePair, floorplan: Floorplan) -> None:
+    def __init__(
+        self,
+        sequence_pair: SequencePair,
+        floorplan: Floorplan,
+        stats: Optional[Dict] = None,
+        interrupted: bool = False,
+        rotations: Optional[List[int]] = None,
+    ) -> None:
 
         if not isinstance(sequence_pair, SequencePair):
             raise TypeError("Invalid argument: 'sequence_pair' must be an instance of SequencePair.")
@@ -31,6 +41,23 @@ class Solution:
 
         self.sequence_pair = sequence_pair
         self.floorplan = floorplan
+        self.stats = stats  # Statistics of solving, which are set on request
+        self.interrupted = interrupted  # Whether solving is stopped by the budget or cancellation
+        self.rotations = rotations  # Rotations of rectangles used to decode the sequence-pair, if known
+
+    def retrieve_rotations(self, problem: Problem) -> List[int]:
+        """
+        Returns the rotations of rectangles. If they are not known, they are retrieved from the floorplan.
+        """
+        if self.rotations is not None:
+            return self.rotations
+
+        rotations = [0] * problem.n
+        for position in self.floorplan.positions:
+            i = position["id"]
+            if (position["width"] != problem.widths[i]) or (position["height"] != problem.heights[i]):
+                rotations[i] = 1
+        return rotations
 
     def __repr__(self) -> str:
         s = "Solution({"
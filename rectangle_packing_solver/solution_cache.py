@@ -0,0 +1,195 @@
+# Copyright 2022 Kotaro Terada
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from .problem import Problem
+from .sequence_pair import SequencePair
+from .solution import Solution
+
+
+class SolutionCache:
+    """
+    A persistent cache of the best known solutions, stored in an SQLite database file.
+    Solutions are keyed by a fingerprint of the problem (sorted dimensions and rotatability) and the width/height
+    limits, so that the same set of rectangles given in a different order hits the same entry.
+    The least recently used entries are evicted when the number of entries exceeds max_entries.
+    The database can be shared by processes, and the cache object can be passed to worker processes.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000, timeout: float = 30.0) -> None:
+        if max_entries < 1:
+            raise ValueError("'max_entries' must be a positive integer.")
+
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout  # Seconds to wait for a lock held by another process
+
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS solutions ("
+                + "fingerprint TEXT PRIMARY KEY, gp TEXT, gn TEXT, rotations TEXT, "
+                + "feasible INTEGER, area REAL, accessed REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS solutions_accessed ON solutions (accessed)")
+
+    def get(
+        self, problem: Problem, width_limit: Optional[float] = None, height_limit: Optional[float] = None
+    ) -> Optional[Solution]:
+        """
+        Returns the stored solution of the problem with the width/height limits, or None if it is not stored.
+        """
+        fingerprint, order, flips = self._canonicalize(problem, width_limit, height_limit)
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT gp, gn, rotations FROM solutions WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE solutions SET accessed = ? WHERE fingerprint = ?", (time.time(), fingerprint))
+
+        # From the canonical indices to the indices of the problem
+        gp = [order[c] for c in json.loads(row[0])]
+        gn = [order[c] for c in json.loads(row[1])]
+        rotations = [0] * problem.n
+        for c, rotation in enumerate(json.loads(row[2])):
+            rotations[order[c]] = rotation ^ flips[order[c]]
+
+        seqpair = SequencePair(pair=(gp, gn))
+        floorplan = seqpair.decode(problem=problem, rotations=rotations)
+        return Solution(sequence_pair=seqpair, floorplan=floorplan, rotations=rotations)
+
+    def put(
+        self,
+        problem: Problem,
+        solution: Solution,
+        width_limit: Optional[float] = None,
+        height_limit: Optional[float] = None,
+    ) -> bool:
+        """
+        Store the solution of the problem with the width/height limits, if it is better than the stored one:
+        a solution satisfying the limits is better than one violating them, and then a smaller area is better.
+        Returns whether the solution is stored.
+        """
+        fingerprint, order, flips = self._canonicalize(problem, width_limit, height_limit)
+        rotations = solution.retrieve_rotations(problem=problem)
+
+        # From the indices of the problem to the canonical indices
+        canonical = [0] * problem.n
+        for c, i in enumerate(order):
+            canonical[i] = c
+        gp = [canonical[i] for i in solution.sequence_pair.gp]
+        gn = [canonical[i] for i in solution.sequence_pair.gn]
+        canonical_rotations = [(rotations[i] % 2) ^ flips[i] for i in order]
+
+        bounding_box = solution.floorplan.bounding_box
+        feasible = ((width_limit is None) or (bounding_box[0] <= width_limit)) and (
+            (height_limit is None) or (bounding_box[1] <= height_limit)
+        )
+
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            cursor = connection.execute(
+                "INSERT INTO solutions (fingerprint, gp, gn, rotations, feasible, area, accessed) "
+                + "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                + "ON CONFLICT (fingerprint) DO UPDATE SET "
+                + "gp = excluded.gp, gn = excluded.gn, rotations = excluded.rotations, "
+                + "feasible = excluded.feasible, area = excluded.area, accessed = excluded.accessed "
+                + "WHERE (solutions.feasible < excluded.feasible) "
+                + "OR (solutions.feasible = excluded.feasible AND excluded.area < solutions.area)",
+                (
+                    fingerprint,
+                    json.dumps(gp),
+                    json.dumps(gn),
+                    json.dumps(canonical_rotations),
+                    int(feasible),
+                    float(solution.floorplan.area),
+                    time.time(),
+                ),
+            )
+            stored = 0 < cursor.rowcount
+
+            # Evict the least recently used entries
+            connection.execute(
+                "DELETE FROM solutions WHERE fingerprint IN "
+                + "(SELECT fingerprint FROM solutions ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+        return stored
+
+    def clear(self) -> None:
+        """
+        Remove all the stored solutions.
+        """
+        with self._connect() as connection:
+            connection.execute("DELETE FROM solutions")
+
+    def __len__(self) -> int:
+        with self._connect() as connection:
+            return int(connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0])
+
+    @classmethod
+    def fingerprint(
+        cls, problem: Problem, width_limit: Optional[float] = None, height_limit: Optional[float] = None
+    ) -> str:
+        """
+        Returns the fingerprint of the problem with the width/height limits.
+        """
+        return cls._canonicalize(problem, width_limit, height_limit)[0]
+
+    @classmethod
+    def _canonicalize(
+        cls, problem: Problem, width_limit: Optional[float], height_limit: Optional[float]
+    ) -> Tuple[str, List[int], List[int]]:
+        """
+        Returns the fingerprint, the indices of rectangles in the canonical order, and whether each rectangle is
+        flipped in the canonical form. A rotatable rectangle is flipped so that its width is not larger than its
+        height.
+        """
+        rectangles = []
+        flips = []
+        for w, h, rot in zip(problem.widths, problem.heights, problem.rotatable):
+            flip = int(bool(rot) and h < w)
+            rectangles.append((float(h), float(w), int(rot)) if flip else (float(w), float(h), int(rot)))
+            flips.append(flip)
+        order = sorted(range(problem.n), key=lambda i: rectangles[i])
+
+        canonical = {
+            "rectangles": [rectangles[i] for i in order],
+            "width_limit": None if width_limit is None else float(width_limit),
+            "height_limit": None if height_limit is None else float(height_limit),
+        }
+        fingerprint = hashlib.sha256(json.dumps(canonical).encode("utf-8")).hexdigest()
+
+        return (fingerprint, order, flips)
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Connect to the database. The transaction begun in the context is committed (or rolled back on errors),
+        and the connection is closed.
+        """
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
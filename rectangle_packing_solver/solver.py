@@ -12,17 +12,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import math
 import random
 import signal
 import sys
-from typing import Any, List, Optional, Tuple
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import simanneal
-from tqdm.auto import tqdm
 
+from .incremental import IncrementalDecoder
 from .problem import Problem
+from .progress import ProgressCallback, ThrottledProgress, TqdmProgress
 from .sequence_pair import SequencePair
 from .solution import Solution
+from .solution_cache import SolutionCache
 
 
 def exit_handler(signum, frame) -> None:  # type: ignore
@@ -32,6 +39,117 @@ def exit_handler(signum, frame) -> None:  # type: ignore
     sys.exit(1)
 
 
+# Annealing schedules estimated for problem signatures (see Solver._schedule_signature)
+_schedule_cache: "OrderedDict[Tuple, Dict]" = OrderedDict()
+_SCHEDULE_CACHE_SIZE = 128
+
+# Moves of the annealer (see RectanglePackingProblemAnnealer), and the parameters of their adaptive selection:
+# the decay of the moving averages of the rates of accepted moves changing the energy, and the minimum probability
+MOVES = ["swap", "exchange", "shift", "rotate", "reverse"]
+_MOVE_RATE_DECAY = 0.01
+_MOVE_MIN_PROBABILITY = 0.05
+
+
+def _solve_chain(task: Dict) -> Tuple[Solution, Dict]:
+    """
+    Run an annealing chain, and return the solution with the statistics of the chain.
+    This is a module-level function so that it can be run in worker processes.
+    """
+    if task["seed"] is not None:
+        random.seed(task["seed"])
+
+    start = time.perf_counter()
+    solution = Solver()._solve(
+        problem=task["problem"],
+        width_limit=task["width_limit"],
+        height_limit=task["height_limit"],
+        simanneal_minutes=task["simanneal_minutes"],
+        simanneal_steps=task["simanneal_steps"],
+        show_progress=task["show_progress"],
+        progress_callback=task.get("progress_callback"),
+        budget=task.get("budget"),
+        cache_size=task.get("cache_size", 0),
+        initial_state=task.get("initial_state"),
+        calibration=task.get("calibration", "estimate"),
+        profile=task.get("profile", False),
+        schedule_seed=task.get("schedule_seed"),
+    )
+    elapsed = time.perf_counter() - start
+
+    bounding_box = solution.floorplan.bounding_box
+    feasible = True
+    if (task["width_limit"] is not None) and (task["width_limit"] < bounding_box[0]):
+        feasible = False
+    if (task["height_limit"] is not None) and (task["height_limit"] < bounding_box[1]):
+        feasible = False
+    chain_stats = {
+        "chain": task.get("chain", 0),
+        "seed": task["seed"],
+        "bounding_box": bounding_box,
+        "area": solution.floorplan.area,
+        "feasible": feasible,
+        "elapsed": elapsed,
+        "interrupted": solution.interrupted,
+    }
+    if solution.stats:
+        # Statistics of the annealer
+        chain_stats.update(solution.stats)
+        solution.stats = None
+
+    return (solution, chain_stats)
+
+
+def _total_stats(chains: List[Dict]) -> Dict[str, Any]:
+    """
+    The totals of the times and the counters in the statistics of chains.
+    """
+    keys = [
+        "elapsed",
+        "calibration_time",
+        "annealing_time",
+        "decode_time",
+        "hard_rejection_time",
+        "evaluations",
+        "accepted",
+        "rejected",
+        "improving",
+    ]
+    return {key: sum([chain.get(key, 0) for chain in chains]) for key in keys}
+
+
+def _solve_problem(task: Tuple[Problem, Dict]) -> Solution:
+    """
+    Solve a problem with the given options of Solver.solve.
+    This is a module-level function so that it can be run in worker processes.
+    """
+    problem, options = task
+    return Solver().solve(problem=problem, **options)
+
+
+def _run_replica(task: Dict) -> Dict:
+    """
+    Run a replica of parallel tempering at a constant temperature, and return its last and best states.
+    This is a module-level function so that it can be run in worker processes.
+    """
+    random.seed(task["seed"])
+
+    rpp = Solver._create_annealer(
+        problem=task["problem"],
+        state=task["state"],
+        width_limit=task["width_limit"],
+        height_limit=task["height_limit"],
+        strategy=task["strategy"],
+    )
+    best_state, best_energy = rpp.run_at_temperature(temperature=task["temperature"], steps=task["steps"])
+
+    return {
+        "state": rpp.state,
+        "energy": rpp.energy(),
+        "best_state": best_state,
+        "best_energy": best_energy,
+    }
+
+
 class Solver:
     """
     A rectangle packing solver.
@@ -49,33 +167,509 @@ class Solver:
         simanneal_steps: int = 100,
         show_progress: bool = False,
         seed: Optional[int] = None,
+        n_workers: int = 1,
+        n_restarts: int = 1,
+        stats: bool = False,
+        deadline: Optional[float] = None,
+        max_evaluations: Optional[int] = None,
+        on_improvement: Optional[Callable[[Solution, float], Any]] = None,
+        cancel: Optional[Any] = None,
+        cache_size: int = 0,
+        solution_cache: Optional[SolutionCache] = None,
+        warm_start: bool = False,
+        initial_solution: Optional[Union[Solution, SequencePair]] = None,
+        initial_rotations: Optional[List[int]] = None,
+        calibration: str = "estimate",
+        progress_callback: Optional[ProgressCallback] = None,
     ) -> Solution:
+        """
+        Solve the problem.
+        If n_restarts is more than one, independent annealing chains are run with random seeds derived from the
+        seed, and the best solution among them is returned. The chains are run in n_workers processes, and the
+        derived seeds do not depend on n_workers. If stats is True, statistics of the chains are set to
+        solution.stats["chains"] (see RectanglePackingProblemAnnealer.stats), with their totals in
+        solution.stats["totals"] and the elapsed time. The statistics are plain dicts to be exported.
+
+        The solving is stopped, including the calibration of the annealing schedule, when the deadline (seconds
+        from the call) passes, when max_evaluations states are evaluated in a chain, or when the cancel event
+        (an object with is_set(), such as threading.Event) is set. Then the best solution found so far is returned
+        with solution.interrupted set to True. on_improvement(solution, elapsed) is called whenever a chain finds
+        a better solution. on_improvement and cancel cannot be used with chains in worker processes.
+
+        If cache_size is positive, each chain keeps an LRU cache of up to cache_size decoded states, and the
+        counters of the cache are set to the statistics of the chains. The cache is off by default, since hashing
+        a state costs about as much as its incremental decoding.
+
+        If solution_cache is given, the best known solution of the same problem and limits is looked up in it.
+        On a hit, the stored solution is returned immediately, or if warm_start is True, it is refined by
+        annealing at low temperatures for simanneal_minutes. The solution found is stored in the cache.
+
+        If initial_solution (a Solution, or a SequencePair with initial_rotations) is given, the solving starts
+        from it, and it is refined by annealing at low temperatures for simanneal_minutes without the calibration
+        of the annealing schedule.
+
+        The annealing schedule is calibrated by either of the following methods:
+        - "estimate": Estimated from the energy differences of a few hundred random moves. The estimated
+          temperatures are cached for the signature of the problem and the seed, so that repeated solving (and the
+          chains after the first one) skips the calibration. The calibration has its own random numbers, so the
+          annealing does not depend on whether the schedule is cached, nor on n_workers.
+        - "auto": Explored by simanneal's auto() with simanneal_steps steps at each temperature.
+        The times of the calibration and the annealing are set to the statistics of the chains.
+
+        progress_callback(step, total, temperature, energy, best_energy) is called at every step of the annealing
+        of each chain. Wrap it with ThrottledProgress to be called every k steps or every t seconds. If show_progress
+        is True, a tqdm progress bar (TqdmProgress) is shown as well. progress_callback cannot be used with chains
+        in worker processes.
+        """
+        start = time.time()
+        if not isinstance(problem, Problem):
+            raise TypeError("Invalid argument: 'problem' must be an instance of Problem.")
+        if n_workers < 1:
+            raise ValueError("'n_workers' must be a positive integer.")
+        if n_restarts < 1:
+            raise ValueError("'n_restarts' must be a positive integer.")
+        if (deadline is not None) and not (0 <= deadline):
+            raise ValueError("'deadline' must be a non-negative number.")
+        if (max_evaluations is not None) and (max_evaluations < 1):
+            raise ValueError("'max_evaluations' must be a positive integer.")
+        if cache_size < 0:
+            raise ValueError("'cache_size' must be a non-negative integer.")
+        if calibration not in ["estimate", "auto"]:
+            raise ValueError("'calibration' must be either of ['estimate', 'auto'].")
+        if (1 < n_workers) and (1 < n_restarts) and ((on_improvement is not None) or (cancel is not None)):
+            raise ValueError("'on_improvement' and 'cancel' cannot be used with more than one worker.")
+        if (1 < n_workers) and (1 < n_restarts) and (progress_callback is not None):
+            raise ValueError("'progress_callback' cannot be used with more than one worker.")
+        self._check_limits(problem, width_limit, height_limit)
+
+        initial_state = None
+        if initial_solution is not None:
+            initial_state = self._warm_start_state(problem, initial_solution, initial_rotations)
+
+        cache_hit = False
+        if solution_cache is not None:
+            cached = solution_cache.get(problem, width_limit, height_limit)
+            cache_hit = cached is not None
+            if (cached is not None) and (not warm_start):
+                if stats:
+                    cached.stats = {
+                        "chains": [],
+                        "best_chain": None,
+                        "totals": _total_stats([]),
+                        "elapsed": time.time() - start,
+                        "cache_hit": True,
+                    }
+                return cached
+            if (cached is not None) and (initial_state is None):
+                initial_state = self._warm_start_state(problem, cached)
+
+        budget = None
+        if any([arg is not None for arg in (deadline, max_evaluations, on_improvement, cancel)]):
+            budget = {
+                "start": start,
+                "deadline": None if deadline is None else start + deadline,
+                "max_evaluations": max_evaluations,
+                "on_improvement": on_improvement,
+                "cancel": cancel,
+            }
+
+        task = {
+            "problem": problem,
+            "width_limit": width_limit,
+            "height_limit": height_limit,
+            "simanneal_minutes": simanneal_minutes,
+            "simanneal_steps": simanneal_steps,
+            "show_progress": show_progress,
+            "progress_callback": progress_callback,
+            "seed": None,
+            "budget": budget,
+            "cache_size": cache_size,
+            "initial_state": initial_state,
+            "calibration": calibration,
+            "profile": stats,
+            "schedule_seed": seed,  # Chains share the schedule estimated with the given seed
+        }
+
+        if n_restarts == 1:
+            if seed:
+                random.seed(seed)
+            solution, chain_stats = _solve_chain(task)
+            chain_stats["seed"] = seed
+            results = [(solution, chain_stats)]
+        else:
+            # Seeds of chains are derived from the given seed
+            rng = random.Random(seed)
+            tasks = [dict(task, seed=rng.randrange(2**32), chain=c) for c in range(n_restarts)]
+            if n_workers == 1:
+                results = [_solve_chain(t) for t in tasks]
+            else:
+                for t in tasks:
+                    t["show_progress"] = False
+                with ProcessPoolExecutor(max_workers=min(n_workers, n_restarts)) as executor:
+                    results = list(executor.map(_solve_chain, tasks))
+
+        # The best solution satisfying width/height limits
+        best = min(range(len(results)), key=lambda c: (not results[c][1]["feasible"], results[c][1]["area"], c))
+        solution = results[best][0]
+        if stats:
+            chains = [chain_stats for _, chain_stats in results]
+            solution.stats = {
+                "chains": chains,
+                "best_chain": best,
+                "totals": _total_stats(chains),
+                "elapsed": time.time() - start,
+            }
+            if solution_cache is not None:
+                solution.stats["cache_hit"] = cache_hit
+
+        if solution_cache is not None:
+            solution_cache.put(problem, solution, width_limit, height_limit)
+
+        return solution
+
+    def update(
+        self,
+        solution: Solution,
+        problem: Problem,
+        added: Optional[List[Union[Dict, List, Tuple]]] = None,
+        removed: Optional[List[int]] = None,
+        width_limit: Optional[float] = None,
+        height_limit: Optional[float] = None,
+        simanneal_minutes: float = 0.01,
+        show_progress: bool = False,
+        seed: Optional[int] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Tuple[Problem, Solution]:
+        """
+        Update a solution of the problem, adding rectangles (in the same formats as Problem takes) and removing
+        the rectangles of the given IDs. Returns the new problem and its solution. In the new problem, the remaining
+        rectangles keep their order and are followed by the added ones.
+        The removed rectangles are deleted from the sequence-pair, and each added one is inserted at the right of
+        or above the others, whichever is better. Then the sequence-pair is refined by annealing at low
+        temperatures for simanneal_minutes, where moves are focused on the rectangles around the changes.
+        """
+        if not isinstance(solution, Solution):
+            raise TypeError("Invalid argument: 'solution' must be an instance of Solution.")
+        if not isinstance(problem, Problem):
+            raise TypeError("Invalid argument: 'problem' must be an instance of Problem.")
+        added_problem = Problem(rectangles=added if added is not None else [])
+        removed = removed if removed is not None else []
+        if any([not (0 <= i < problem.n) for i in removed]) or (len(set(removed)) != len(removed)):
+            raise ValueError("'removed' must be a list of unique IDs of rectangles in the problem.")
+        if problem.n - len(removed) + added_problem.n < 2:
+            raise ValueError("The updated problem must have two or more rectangles.")
+        state = self._warm_start_state(problem, solution)
+        gp, gn, rotations = RectanglePackingProblemAnnealer.retrieve_pairs(n=problem.n, state=state)
+
+        # Remove rectangles, and renumber the remaining ones
+        removed_set = set(removed)
+        kept = [i for i in range(problem.n) if i not in removed_set]
+        new_ids = {i: new_id for new_id, i in enumerate(kept)}
+        focus = set()
+        for sequence in (gp, gn):
+            for index, i in enumerate(sequence):
+                if i in removed_set:
+                    # Rectangles next to the removed ones
+                    focus.update([j for j in sequence[max(index - 2, 0) : index + 3] if j not in removed_set])
+        focus_ids = [new_ids[i] for i in focus]
+        gp = [new_ids[i] for i in gp if i not in removed_set]
+        gn = [new_ids[i] for i in gn if i not in removed_set]
+        rotations = [rotations[i] for i in kept]
+        all_widths, all_heights = problem._dimensions()
+        widths = [all_widths[i] for i in kept]
+        heights = [all_heights[i] for i in kept]
+        rotatable = [problem.rotatable[i] for i in kept]
+
+        # Insert rectangles at the right of (the ends of G_{+} and G_{-}) or above (the head of G_{+} and the end of
+        # G_{-}) the others, with or without rotation.
+        wl = width_limit if width_limit is not None else sys.float_info.max
+        hl = height_limit if height_limit is not None else sys.float_info.max
+        added_widths, added_heights = added_problem._dimensions()
+        for k in range(added_problem.n):
+            new_id = len(widths)
+            widths.append(added_widths[k])
+            heights.append(added_heights[k])
+            rotatable.append(added_problem.rotatable[k])
+            current = Problem.from_arrays(widths=widths, heights=heights, rotatable=rotatable)
+
+            candidates = []
+            for rotation in [0, 1] if added_problem.rotatable[k] else [0]:
+                for candidate_gp in (gp + [new_id], [new_id] + gp):
+                    seqpair = SequencePair(pair=(candidate_gp, gn + [new_id]))
+                    bb = seqpair.bounding_box(problem=current, rotations=rotations + [rotation])
+                    candidates.append(((wl < bb[0]) or (hl < bb[1]), bb[0] * bb[1], candidate_gp, rotation))
+            _, _, gp, rotation = min(candidates, key=lambda c: (c[0], c[1]))
+            gn = gn + [new_id]
+            rotations = rotations + [rotation]
+            focus_ids.append(new_id)
+
+        new_problem = Problem.from_arrays(widths=widths, heights=heights, rotatable=rotatable)
+        self._check_limits(new_problem, width_limit, height_limit)
+
+        # Localized re-optimization
         if seed:
             random.seed(seed)
+        width_limit, height_limit, strategy = self._select_strategy(width_limit, height_limit)
+        new_solution = self._solve_with_strategy(
+            new_problem,
+            width_limit,
+            height_limit,
+            gp + gn + rotations,
+            simanneal_minutes,
+            show_progress=show_progress,
+            progress_callback=progress_callback,
+            strategy=strategy,
+            focus=sorted(focus_ids) if focus_ids else None,
+        )
+        new_solution.stats = None
+
+        return (new_problem, new_solution)
 
+    def solve_many(
+        self,
+        problems: Iterable[Union[Problem, Tuple[Problem, Dict]]],
+        n_workers: int = 1,
+        max_pending: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Iterator[Tuple[int, Solution]]:
+        """
+        Solve problems given by an iterable, and yield pairs of the index and the solution as they are finished.
+        An item of the iterable is a problem, or a pair of a problem and a dict of options overriding kwargs.
+        The options (kwargs) are the same as Solver.solve takes. The problems are solved in n_workers processes,
+        and at most max_pending problems (2 * n_workers by default) are taken from the iterable before their
+        solutions are yielded, so that the iterable can be unbounded.
+        """
+        if n_workers < 1:
+            raise ValueError("'n_workers' must be a positive integer.")
+        if max_pending is None:
+            max_pending = 2 * n_workers
+        if max_pending < 1:
+            raise ValueError("'max_pending' must be a positive integer.")
+
+        def tasks() -> Iterator[Tuple[Problem, Dict]]:
+            for item in problems:
+                if isinstance(item, tuple):
+                    problem, options = item
+                    yield (problem, dict(kwargs, **options))
+                else:
+                    yield (item, kwargs)
+
+        if n_workers == 1:
+            for index, task in enumerate(tasks()):
+                yield (index, _solve_problem(task))
+            return
+
+        executor = ProcessPoolExecutor(max_workers=n_workers)
+        pending: Dict[Future, int] = {}  # Futures of solutions with the indices of problems
+        try:
+            for index, task in enumerate(tasks()):
+                # Progress reports of workers are disabled
+                options = dict(task[1], show_progress=False, progress_callback=None)
+                future = executor.submit(_solve_problem, (task[0], options))
+                pending[future] = index
+                if len(pending) < max_pending:
+                    continue
+
+                # Backpressure: wait for a solution before taking the next problem
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield (pending.pop(future), future.result())
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield (pending.pop(future), future.result())
+        finally:
+            # Futures which are not started are cancelled (shutdown(cancel_futures=True) needs Python 3.9+)
+            for future in pending:
+                future.cancel()
+            executor.shutdown()
+
+    def solve_parallel_tempering(
+        self,
+        problem: Problem,
+        width_limit: Optional[float] = None,
+        height_limit: Optional[float] = None,
+        n_replicas: int = 4,
+        temperatures: Optional[List[float]] = None,
+        exchange_steps: int = 100,
+        n_rounds: Optional[int] = None,
+        minutes: float = 0.1,
+        seed: Optional[int] = None,
+        n_workers: int = 1,
+        stats: bool = False,
+    ) -> Solution:
+        """
+        Solve the problem by parallel tempering (replica-exchange Monte Carlo).
+        Replicas are run at a ladder of temperatures for exchange_steps steps in each round, and the states of
+        neighboring temperatures are exchanged between rounds. The rounds are repeated n_rounds times, or until
+        the given minutes elapse if n_rounds is None. If temperatures are not given, a geometric ladder of
+        n_replicas temperatures is estimated from the energy differences of random moves.
+        If stats is True, statistics of the exchanges are set to solution.stats.
+        """
         if not isinstance(problem, Problem):
             raise TypeError("Invalid argument: 'problem' must be an instance of Problem.")
+        if temperatures is not None:
+            if (len(temperatures) < 1) or any([not (0 < t) for t in temperatures]):
+                raise ValueError("'temperatures' must be a non-empty list of positive numbers.")
+            n_replicas = len(temperatures)
+        if n_replicas < 1:
+            raise ValueError("'n_replicas' must be a positive integer.")
+        if exchange_steps < 1:
+            raise ValueError("'exchange_steps' must be a positive integer.")
+        if (n_rounds is not None) and (n_rounds < 1):
+            raise ValueError("'n_rounds' must be a positive integer.")
+        if n_workers < 1:
+            raise ValueError("'n_workers' must be a positive integer.")
+        self._check_limits(problem, width_limit, height_limit)
 
-        # If width/height limits are not given...
-        if (width_limit is None) and (height_limit is None):
-            return self._solve_with_strategy(
-                problem,
-                width_limit,
-                height_limit,
-                None,
-                simanneal_minutes,
-                simanneal_steps,
-                show_progress,
-                strategy="hard",
+        start = time.perf_counter()
+        if seed:
+            random.seed(seed)
+        rng = random.Random(seed)  # Seeds of replicas and exchanges are derived from the given seed
+
+        width_limit, height_limit, strategy = self._select_strategy(width_limit, height_limit)
+        states = [self._initial_state(problem, width_limit, height_limit) for _ in range(n_replicas)]
+        if temperatures is None:
+            temperatures = self._temperature_ladder(
+                self._create_annealer(problem, states[0][:], width_limit, height_limit, strategy=strategy),
+                n_replicas,
             )
+        else:
+            temperatures = sorted(temperatures)
+
+        energies: List[float] = [0.0] * n_replicas
+        best_state, best_energy = states[0], sys.float_info.max
+        attempted = [0] * (n_replicas - 1)
+        accepted = [0] * (n_replicas - 1)
+        executor = ProcessPoolExecutor(max_workers=min(n_workers, n_replicas)) if 1 < n_workers else None
+        try:
+            rounds = 0
+            while True:
+                tasks = [
+                    {
+                        "problem": problem,
+                        "width_limit": width_limit,
+                        "height_limit": height_limit,
+                        "strategy": strategy,
+                        "state": states[k],
+                        "temperature": temperatures[k],
+                        "steps": exchange_steps,
+                        "seed": rng.randrange(2**32),
+                    }
+                    for k in range(n_replicas)
+                ]
+                if executor is None:
+                    results = [_run_replica(t) for t in tasks]
+                else:
+                    results = list(executor.map(_run_replica, tasks))
+
+                for k, result in enumerate(results):
+                    states[k], energies[k] = result["state"], result["energy"]
+                    if result["best_energy"] < best_energy:
+                        best_state, best_energy = result["best_state"], result["best_energy"]
+
+                # Exchange the states of neighboring temperatures (even and odd pairs alternately)
+                for k in range(rounds % 2, n_replicas - 1, 2):
+                    attempted[k] += 1
+                    delta = (1 / temperatures[k] - 1 / temperatures[k + 1]) * (energies[k] - energies[k + 1])
+                    if (0 <= delta) or (rng.random() < math.exp(delta)):
+                        accepted[k] += 1
+                        states[k], states[k + 1] = states[k + 1], states[k]
+                        energies[k], energies[k + 1] = energies[k + 1], energies[k]
+
+                rounds += 1
+                if n_rounds is None:
+                    if minutes * 60 <= time.perf_counter() - start:
+                        break
+                elif n_rounds <= rounds:
+                    break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        # Convert the best state to a Solution object
+        gp, gn, rotations = RectanglePackingProblemAnnealer.retrieve_pairs(n=problem.n, state=best_state)
+        seqpair = SequencePair(pair=(gp, gn))
+        floorplan = seqpair.decode(problem=problem, rotations=rotations)
+        solution = Solution(sequence_pair=seqpair, floorplan=floorplan)
+        if stats:
+            solution.stats = {
+                "temperatures": temperatures,
+                "rounds": rounds,
+                "exchange_steps": exchange_steps,
+                "swaps_attempted": attempted,
+                "swaps_accepted": accepted,
+                "best_energy": best_energy,
+                "elapsed": time.perf_counter() - start,
+            }
+
+        return solution
+
+    @classmethod
+    def _temperature_ladder(cls, annealer: "RectanglePackingProblemAnnealer", n_replicas: int) -> List[float]:
+        """
+        Estimate a geometric ladder of temperatures in ascending order. Small uphill moves (the 10th percentile)
+        are accepted with probability 0.001 at the highest temperature, and the smallest one is accepted with the
+        same probability at the lowest temperature (at most a tenth of the highest one).
+        A narrow ladder keeps the exchanges between replicas.
+        """
+        deltas = sorted([d for d in annealer.sample_energy_deltas(n_samples=100) if 0 < d])
+        if not deltas:
+            return [1.0] * n_replicas
+
+        t_max = -deltas[len(deltas) // 10] / math.log(0.001)
+        t_min = min(-deltas[0] / math.log(0.001), t_max / 10)
+        if n_replicas == 1:
+            return [t_min]
+        return [t_min * (t_max / t_min) ** (k / (n_replicas - 1)) for k in range(n_replicas)]
+
+    @classmethod
+    def _warm_start_state(
+        cls,
+        problem: Problem,
+        initial_solution: Union[Solution, SequencePair],
+        initial_rotations: Optional[List[int]] = None,
+    ) -> List[int]:
+        """
+        Convert a solution, or a sequence-pair with rotations, to a state of the annealer.
+        """
+        if isinstance(initial_solution, Solution):
+            seqpair = initial_solution.sequence_pair
+            if initial_rotations is None:
+                initial_rotations = initial_solution.retrieve_rotations(problem=problem)
+        elif isinstance(initial_solution, SequencePair):
+            seqpair = initial_solution
+        else:
+            raise TypeError("Invalid argument: 'initial_solution' must be an instance of Solution or SequencePair.")
+        if initial_rotations is None:
+            initial_rotations = [0] * problem.n
+
+        if (sorted(seqpair.gp) != list(range(problem.n))) or (sorted(seqpair.gn) != list(range(problem.n))):
+            raise ValueError("'initial_solution' must be a sequence-pair of the rectangles of the problem.")
+        if len(initial_rotations) != problem.n:
+            raise ValueError("'initial_rotations' must have the same length as the number of rectangles.")
+        for i, rotation in enumerate(initial_rotations):
+            if (rotation % 2 == 1) and (not problem.rotatable[i]):
+                raise ValueError("A rectangle which is not rotatable cannot be rotated.")
+
+        return list(seqpair.gp) + list(seqpair.gn) + [rotation % 2 for rotation in initial_rotations]
+
+    @classmethod
+    def _check_limits(cls, problem: Problem, width_limit: Optional[float], height_limit: Optional[float]) -> None:
+        """
+        Check that width/height limits are not less than the largest width/height of the given problem.
+        """
+        if (width_limit is None) and (height_limit is None):
+            return
 
-        # If width/height limits are given...
         if width_limit is None:
             width_limit = sys.float_info.max
         if height_limit is None:
             height_limit = sys.float_info.max
-        max_width = max([min(r["width"], r["height"]) if r["rotatable"] else r["width"] for r in problem.rectangles])
-        max_height = max([min(r["width"], r["height"]) if r["rotatable"] else r["height"] for r in problem.rectangles])
+        rectangles = list(zip(problem.widths, problem.heights, problem.rotatable))
+        max_width = max([min(w, h) if rot else w for w, h, rot in rectangles])
+        max_height = max([min(w, h) if rot else h for w, h, rot in rectangles])
         if width_limit < max_width:
             raise ValueError(
                 f"'width_limit' must be greater than or equal to {max_width} "
@@ -87,6 +681,57 @@ class Solver:
                 + "(= the largest height of the given problem)."
             )
 
+    def _solve(
+        self,
+        problem: Problem,
+        width_limit: Optional[float] = None,
+        height_limit: Optional[float] = None,
+        simanneal_minutes: float = 0.1,
+        simanneal_steps: int = 100,
+        show_progress: bool = False,
+        budget: Optional[Dict] = None,
+        cache_size: int = 0,
+        initial_state: Optional[List[int]] = None,
+        calibration: str = "estimate",
+        profile: bool = False,
+        progress_callback: Optional[ProgressCallback] = None,
+        schedule_seed: Optional[int] = None,
+    ) -> Solution:
+        width_limit, height_limit, strategy = self._select_strategy(width_limit, height_limit)
+        return self._solve_with_strategy(
+            problem,
+            width_limit,
+            height_limit,
+            initial_state,
+            simanneal_minutes,
+            simanneal_steps,
+            show_progress,
+            strategy=strategy,
+            budget=budget,
+            cache_size=cache_size,
+            calibration=calibration,
+            profile=profile,
+            progress_callback=progress_callback,
+            schedule_seed=schedule_seed,
+        )
+
+    @classmethod
+    def _select_strategy(
+        cls, width_limit: Optional[float], height_limit: Optional[float]
+    ) -> Tuple[Optional[float], Optional[float], str]:
+        """
+        Select the strategy of the annealer by width/height limits. Returns the limits with the strategy.
+        """
+        # If width/height limits are not given...
+        if (width_limit is None) and (height_limit is None):
+            return (width_limit, height_limit, "hard")
+
+        # If width/height limits are given...
+        if width_limit is None:
+            width_limit = sys.float_info.max
+        if height_limit is None:
+            height_limit = sys.float_info.max
+
         # If constraints of width and/or hight are given,
         # we can use two kinds of annealer in a hybrid way.
         # - 1) Hard constraints strategy:
@@ -94,27 +739,9 @@ class Solver:
         # - 2) Soft constraints strategy:
         #      Find a solution with smallest area as possible, the width/height limits may not be met.
         if (width_limit < sys.float_info.max) and (height_limit < sys.float_info.max):
-            return self._solve_with_strategy(
-                problem,
-                width_limit,
-                height_limit,
-                None,
-                simanneal_minutes,
-                simanneal_steps,
-                show_progress,
-                strategy="soft",
-            )
+            return (width_limit, height_limit, "soft")
         else:
-            return self._solve_with_strategy(
-                problem,
-                width_limit,
-                height_limit,
-                None,
-                simanneal_minutes,
-                simanneal_steps,
-                show_progress,
-                strategy="hard",
-            )
+            return (width_limit, height_limit, "hard")
 
     def _solve_with_strategy(
         self,
@@ -126,58 +753,226 @@ class Solver:
         simanneal_steps: int = 100,
         show_progress: bool = False,
         strategy: str = None,
+        budget: Optional[Dict] = None,
+        cache_size: int = 0,
+        focus: Optional[List[int]] = None,
+        calibration: str = "estimate",
+        profile: bool = False,
+        progress_callback: Optional[ProgressCallback] = None,
+        schedule_seed: Optional[int] = None,
     ) -> Solution:
+        """
+        Solve the problem with the strategy. The statistics of the annealer are set to solution.stats.
+        The annealing schedule is estimated with schedule_seed (see _estimated_schedule).
+        """
         if not initial_state:
-            # Initial state (= G_{+} + G_{-} + rotations)
-            if width_limit and (width_limit < sys.float_info.max):
-                # As flat as possible along with vertical line
-                init_gp = list(range(problem.n))
-                init_gn = list(reversed(list(range(problem.n))))
-                init_rot = [1 if r["rotatable"] and r["width"] > r["height"] else 0 for r in problem.rectangles]
-            elif height_limit and (height_limit < sys.float_info.max):
-                # As flat as possible along with horizontal line
-                init_gp = list(range(problem.n))
-                init_gn = list(range(problem.n))
-                init_rot = [1 if r["rotatable"] and r["width"] < r["height"] else 0 for r in problem.rectangles]
-            else:
-                # Random sequence pair (shuffle)
-                init_gp = random.sample(list(range(problem.n)), k=problem.n)
-                init_gn = random.sample(list(range(problem.n)), k=problem.n)
-                init_rot = [0 for _ in range(problem.n)]
-            init_state = init_gp + init_gn + init_rot
+            init_state = self._initial_state(problem, width_limit, height_limit)
         else:
             init_state = initial_state
 
+        rpp = self._create_annealer(
+            problem=problem,
+            state=init_state,
+            width_limit=width_limit,
+            height_limit=height_limit,
+            show_progress=show_progress,
+            progress_callback=progress_callback,
+            strategy=strategy,
+            cache_size=cache_size,
+        )
+
+        if budget is not None:
+            rpp.set_budget(**budget)
+        rpp.focus = focus
+        rpp.profile = profile
+
+        if threading.current_thread() is threading.main_thread():
+            # Signal handlers can be set only in the main thread
+            signal.signal(signal.SIGINT, exit_handler)
+        interrupted = False
+        schedule_cached = False
+        start = time.perf_counter()
+        calibration_time = 0.0
+        try:
+            if initial_state:
+                # Refine the given state at low temperatures
+                schedule = rpp.refinement_schedule(minutes=simanneal_minutes)
+            elif calibration == "auto":
+                schedule = rpp.auto(minutes=simanneal_minutes, steps=simanneal_steps)
+            else:
+                schedule, schedule_cached = self._estimated_schedule(
+                    problem, width_limit, height_limit, strategy, simanneal_minutes, seed=schedule_seed, budget=budget
+                )
+                schedule["updates"] = rpp.updates
+                schedule["steps"] = int(schedule["speed"] * 60.0 * simanneal_minutes)
+            calibration_time = time.perf_counter() - start
+            rpp.set_schedule(rpp.fit_schedule(schedule))
+            final_state, final_energy = rpp.anneal()
+        except BudgetExhaustedException:
+            interrupted = True
+        if calibration_time == 0.0:
+            calibration_time = time.perf_counter() - start
+
+        # The best state may be found before the annealing (or when it is interrupted)
+        if interrupted or (rpp.best_so_far[1] < final_energy):
+            final_state = rpp.best_so_far[0]
+
+        # Convert simanneal's final_state to a Solution object
+        solution = rpp.to_solution(state=final_state)
+        solution.interrupted = interrupted
+        solution.stats = {
+            "calibration_time": calibration_time,
+            "annealing_time": time.perf_counter() - start - calibration_time,
+            "schedule_cached": schedule_cached,
+        }
+        solution.stats.update(rpp.stats())
+
+        return solution
+
+    @classmethod
+    def _schedule_signature(
+        cls, problem: Problem, width_limit: Optional[float], height_limit: Optional[float], strategy: Optional[str]
+    ) -> Tuple:
+        """
+        The signature of a problem to share estimated annealing schedules: the number of rectangles, statistics of
+        their dimensions (in two significant figures), the limits, and the strategy.
+        """
+
+        def figures(x: float) -> float:
+            return float(f"{x:.2g}")
+
+        widths, heights = problem.widths, problem.heights
+        return (
+            problem.n,
+            figures(sum(widths) / problem.n),
+            figures(sum(heights) / problem.n),
+            figures(max(widths)),
+            figures(max(heights)),
+            sum(problem.rotatable),
+            width_limit,
+            height_limit,
+            strategy,
+        )
+
+    @classmethod
+    def _estimated_schedule(
+        cls,
+        problem: Problem,
+        width_limit: Optional[float],
+        height_limit: Optional[float],
+        strategy: Optional[str],
+        minutes: float,
+        seed: Optional[int] = None,
+        budget: Optional[Dict] = None,
+    ) -> Tuple[Dict, bool]:
+        """
+        Returns the annealing schedule estimated for the problem, and whether it is found in the cache.
+        The schedule is estimated by an annealer of its own, from an initial state drawn with the seed, on a random
+        stream of its own. So, the schedule depends only on the signature of the problem, the strategy, and the seed,
+        and the annealing does not depend on whether the schedule is cached. The deadline and the cancel event of
+        the budget stop the estimation, but its evaluations are not counted in max_evaluations.
+        """
+        signature = cls._schedule_signature(problem, width_limit, height_limit, strategy) + (seed,)
+        if signature in _schedule_cache:
+            _schedule_cache.move_to_end(signature)
+            return (dict(_schedule_cache[signature]), True)
+
+        random_state = random.getstate()
+        try:
+            random.seed(seed)
+            rpp = cls._create_annealer(
+                problem=problem,
+                state=cls._initial_state(problem, width_limit, height_limit),
+                width_limit=width_limit,
+                height_limit=height_limit,
+                strategy=strategy,
+            )
+            if threading.current_thread() is threading.main_thread():
+                # Override simanneal's SIGINT handler again
+                signal.signal(signal.SIGINT, exit_handler)
+            if budget is not None:
+                rpp.set_budget(start=budget["start"], deadline=budget["deadline"], cancel=budget["cancel"])
+            schedule = rpp.estimate_schedule(minutes=minutes)
+        finally:
+            random.setstate(random_state)
+
+        _schedule_cache[signature] = schedule
+        if _SCHEDULE_CACHE_SIZE < len(_schedule_cache):
+            _schedule_cache.popitem(last=False)
+        return (dict(schedule), False)
+
+    @classmethod
+    def clear_schedule_cache(cls) -> None:
+        """
+        Clear the cache of the estimated annealing schedules.
+        """
+        _schedule_cache.clear()
+
+    @classmethod
+    def _initial_state(
+        cls, problem: Problem, width_limit: Optional[float] = None, height_limit: Optional[float] = None
+    ) -> List[int]:
+        """
+        Initial state (= G_{+} + G_{-} + rotations)
+        """
+        if width_limit and (width_limit < sys.float_info.max):
+            # As flat as possible along with vertical line
+            init_gp = list(range(problem.n))
+            init_gn = list(reversed(list(range(problem.n))))
+            init_rot = [
+                1 if rot and w > h else 0 for w, h, rot in zip(problem.widths, problem.heights, problem.rotatable)
+            ]
+        elif height_limit and (height_limit < sys.float_info.max):
+            # As flat as possible along with horizontal line
+            init_gp = list(range(problem.n))
+            init_gn = list(range(problem.n))
+            init_rot = [
+                1 if rot and w < h else 0 for w, h, rot in zip(problem.widths, problem.heights, problem.rotatable)
+            ]
+        else:
+            # Random sequence pair (shuffle)
+            init_gp = random.sample(list(range(problem.n)), k=problem.n)
+            init_gn = random.sample(list(range(problem.n)), k=problem.n)
+            init_rot = [0 for _ in range(problem.n)]
+        return init_gp + init_gn + init_rot
+
+    @classmethod
+    def _create_annealer(
+        cls,
+        problem: Problem,
+        state: List[int],
+        width_limit: Optional[float] = None,
+        height_limit: Optional[float] = None,
+        show_progress: bool = False,
+        progress_callback: Optional[ProgressCallback] = None,
+        strategy: Optional[str] = None,
+        cache_size: int = 0,
+    ) -> "RectanglePackingProblemAnnealer":
+        rpp: RectanglePackingProblemAnnealer
         if strategy == "hard":
             rpp = RectanglePackingProblemAnnealerHard(
-                state=init_state,
+                state=state,
                 problem=problem,
                 width_limit=width_limit,
                 height_limit=height_limit,
                 show_progress=show_progress,
+                progress_callback=progress_callback,
+                cache_size=cache_size,
             )
         elif strategy == "soft":
             rpp = RectanglePackingProblemAnnealerSoft(
-                state=init_state,
+                state=state,
                 problem=problem,
                 width_limit=width_limit,
                 height_limit=height_limit,
                 show_progress=show_progress,
+                progress_callback=progress_callback,
+                cache_size=cache_size,
             )
         else:
             raise ValueError("'strategy' must be either of ['hard', 'soft'].")
-
-        signal.signal(signal.SIGINT, exit_handler)
         rpp.copy_strategy = "slice"  # We use "slice" since the state is a list
-        rpp.set_schedule(rpp.auto(minutes=simanneal_minutes, steps=simanneal_steps))
-        final_state, _ = rpp.anneal()
-
-        # Convert simanneal's final_state to a Solution object
-        gp, gn, rotations = rpp.retrieve_pairs(n=problem.n, state=final_state)
-        seqpair = SequencePair(pair=(gp, gn))
-        floorplan = seqpair.decode(problem=problem, rotations=rotations)
-
-        return Solution(sequence_pair=seqpair, floorplan=floorplan)
+        return rpp
 
 
 class RectanglePackingProblemAnnealer(simanneal.Annealer):
@@ -192,17 +987,17 @@ class RectanglePackingProblemAnnealer(simanneal.Annealer):
         width_limit: Optional[float] = None,
         height_limit: Optional[float] = None,
         show_progress: bool = False,
+        cache_size: int = 0,
+        moves: Optional[List[str]] = None,
+        progress_callback: Optional[ProgressCallback] = None,
     ) -> None:
         self.seqpair = SequencePair()
         self.problem = problem
 
         # The max possible width and height to deal with the size limit.
-        self.max_possible_width = sum(
-            [max(r["width"], r["height"]) if r["rotatable"] else r["width"] for r in problem.rectangles]
-        )
-        self.max_possible_height = sum(
-            [max(r["width"], r["height"]) if r["rotatable"] else r["height"] for r in problem.rectangles]
-        )
+        rectangles = list(zip(problem.widths, problem.heights, problem.rotatable))
+        self.max_possible_width = sum([max(w, h) if rot else w for w, h, rot in rectangles])
+        self.max_possible_height = sum([max(w, h) if rot else h for w, h, rot in rectangles])
 
         self.width_limit: float = sys.float_info.max
         if width_limit:
@@ -211,36 +1006,742 @@ class RectanglePackingProblemAnnealer(simanneal.Annealer):
         if height_limit:
             self.height_limit = height_limit
         self.state: List[int] = []
-        self._step: int = 0  # Current annealing step
-        self._prev_step: int = 0  # Previous step in the update method
-        self._annealing_phase: bool = False  # Annealing phase: True / Auto phase: False
-        self._progress: Any = None  # tqdm progress bar
-        self._show_progress: bool = show_progress
-        super(RectanglePackingProblemAnnealer, self).__init__(state)
 
-    def update(self, step: int, T: int, E: float, acceptance: float, improvement: float) -> None:
+        # Callbacks reporting the progress of the annealing, with the tqdm progress bar (if it is shown)
+        self._progress_callbacks: List[ProgressCallback] = []
+        self._tqdm: Optional[TqdmProgress] = None
+        if show_progress:
+            self._tqdm = TqdmProgress(desc="Progress")
+            self._progress_callbacks.append(ThrottledProgress(self._tqdm, every_seconds=0.1))
+        if progress_callback is not None:
+            self._progress_callbacks.append(progress_callback)
+
+        # The last accepted state (a copy) and the state made by the last move, with their energy and bounding box.
+        # These are used to avoid decoding the same state again.
+        self._current: Optional[Tuple[List[int], float, Tuple]] = None
+        self._candidate: Optional[Tuple[List[int], float, Tuple]] = None
+
+        # The decoder keeps the longest paths of the accepted state, and decodes a moved state incrementally.
+        self._decoder = IncrementalDecoder(problem=problem)
+
+        # The best state evaluated so far with its energy, and the budget of evaluations
+        self._best: Optional[Tuple[List[int], float]] = None
+        self._evaluations: int = 0
+        self._decode_time: float = 0.0  # Time to decode a state from scratch, which is reserved before the deadline
+        self._start: float = time.time()
+        self._deadline: Optional[float] = None
+        self._max_evaluations: Optional[int] = None
+        self._on_improvement: Optional[Callable[[Solution, float], Any]] = None
+        self._cancel: Optional[Any] = None
+
+        # LRU cache of decoded states: the hash of a state -> (width, height, area)
+        # A moved state found in the cache is not decoded. If it is accepted, the decoder evaluates the move when it
+        # is committed, as it would have done without the cache.
+        if cache_size < 0:
+            raise ValueError("'cache_size' must be a non-negative integer.")
+        self._cache: "OrderedDict[int, Tuple[Any, Any, Any]]" = OrderedDict()
+        self._cache_size: int = cache_size
+        self._cache_info: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+        self._candidate_cached: bool = False  # Whether the candidate is found in the cache
+        self._candidate_move: Dict = {}  # The move of the candidate found in the cache
+
+        # If the IDs of rectangles are given, moves are focused on them: one of the moved rectangles is in them.
+        self.focus: Optional[List[int]] = None
+
+        # The last move applied to the state in place: the kind (0: two pairs of swapped indices, which are the same
+        # indices for no swap, 1: an element shifted from the first index to the second one, 2: the reversed range
+        # of the indices), the indices, and the index of the rotation (or -1).
+        self._undo_record: List[int] = [0, 0, 0, 0, 0, -1]
+
+        # The portfolio of moves. A move is selected with the probability in proportion to the moving average of
+        # the rate of accepted moves changing the energy (at least _MOVE_MIN_PROBABILITY).
+        self._rotatable_ids = [i for i in range(problem.n) if problem.rotatable[i]]
+        if moves is None:
+            moves = [m for m in MOVES if (m != "rotate") or self._rotatable_ids]
+        if (not moves) or any([m not in MOVES for m in moves]):
+            raise ValueError(f"'moves' must be a non-empty list of {MOVES}.")
+        self._moves: List[str] = list(moves)
+        self._move_functions: List[Callable[[], Dict]] = [
+            {
+                "swap": self._swap_and_rotate,
+                "exchange": self._exchange_move,
+                "shift": self._shift_move,
+                "rotate": self._rotate_move,
+                "reverse": self._reverse_move,
+            }[m]
+            for m in moves
+        ]
+        self._move_rates: List[float] = [1.0] * len(moves)
+        self._move_selected: List[int] = [0] * len(moves)
+        self._move_accepted: List[int] = [0] * len(moves)
+        self._last_move: int = -1  # The index of the move selected last (or -1 if it is not selected adaptively)
+
+        # The numbers of trials to find the moves: the number of moves with each number of trials
+        self._trial_counts: Dict[int, int] = {}
+
+        # Counters of the decisions of moves, and timers (seconds) of decoding and of the trials violating the limits,
+        # which are measured only if profile is True
+        self._counters: Dict[str, int] = {"accepted": 0, "rejected": 0, "improving": 0}
+        self._timers: Dict[str, float] = {"decode": 0.0, "hard_rejection": 0.0}
+        self.profile: bool = False
+        self._final_temperature: Optional[float] = None
+
+        if threading.current_thread() is threading.main_thread():
+            super(RectanglePackingProblemAnnealer, self).__init__(state)
+        else:
+            # simanneal traps SIGINT in __init__, which is possible only in the main thread
+            self.state = self.copy_state(state)
+
+    def update(self, step: int, T: int, E: float, acceptance: Optional[float], improvement: Optional[float]) -> None:
         """
         Override the default_update method.
-        Purpose: Introduce steps, disable stderr output, and progress visualization.
+        Purpose: Disable stderr output (progress is reported by the anneal method).
         """
-        self._step = step
-        if self._annealing_phase and self._show_progress:
-            self._progress.update(step - self._prev_step)
-            self._prev_step = step
 
     def anneal(self) -> Any:
         """
-        Override the anneal method for progress visualization.
+        Override the anneal method with the native annealing loop, and for progress reports.
+        The same schedule and acceptance criterion as simanneal are used, but a move is applied to the state in place
+        and undone if rejected, instead of copying the state in every step. The best state is copied only when it is
+        improved. The progress callbacks are called at every step.
+        Note that a step still allocates: the decoder reads G_{+}, G_{-}, and rotations sliced from the state
+        (see _decode), and keeps the longest paths of the moved state in lists of its own.
+        """
+        progress_callbacks = self._progress_callbacks
+        step = 0
+        self.start = time.time()
+
+        # Precompute factor for exponential cooling from Tmax to Tmin
+        if self.Tmin <= 0.0:
+            raise ValueError("Exponential cooling requires a minimum temperature greater than zero.")
+        Tfactor = -math.log(self.Tmax / self.Tmin)
+
+        # Note initial state
+        T = self.Tmax
+        _, prev_energy, bounding_box = self._accepted()
+        E = prev_energy
+        best_state, best_energy = self.state[:], E
+        trials, accepts, improves = 0, 0, 0
+        if self.updates > 0:
+            update_wavelength = self.steps / self.updates
+            self.update(step, T, E, None, None)
+        for callback in progress_callbacks:
+            callback(step, self.steps, T, E, best_energy)
+
+        # Attempt moves to new states
+        try:
+            while (step < self.steps) and (not self.user_exit):
+                step += 1
+                T = self.Tmax * math.exp(Tfactor * step / self.steps)
+                energy, candidate_bounding_box = self._apply_move()
+                self._improve(state=self.state, energy=energy)
+                dE = energy - prev_energy
+                E += dE
+                trials += 1
+                if (0.0 < dE) and (math.exp(-dE / T) < random.random()):
+                    # Restore previous state
+                    self._undo()
+                    self._record_acceptance(accepted=False, delta=dE)
+                    E = prev_energy
+                else:
+                    # Accept new state and compare to best state
+                    self._commit()
+                    self._record_acceptance(accepted=True, delta=dE)
+                    accepts += 1
+                    if dE < 0.0:
+                        improves += 1
+                    prev_energy, bounding_box = energy, candidate_bounding_box
+                    if E < best_energy:
+                        best_state, best_energy = self.state[:], E
+                if self.updates > 1:
+                    if (step // update_wavelength) > ((step - 1) // update_wavelength):
+                        self.update(step, T, E, accepts / trials, improves / trials)
+                        trials, accepts, improves = 0, 0, 0
+                if progress_callbacks:
+                    for callback in progress_callbacks:
+                        callback(step, self.steps, T, E, best_energy)
+        except BaseException:
+            # The state may be moved without evaluation, and then it is decoded from scratch when it is needed
+            self._current = None
+            raise
+        finally:
+            self._final_temperature = T
+            if self._tqdm is not None:
+                self._tqdm.close()
+
+        # The decoder keeps the last accepted state
+        self._current = (self.state[:], prev_energy, bounding_box)
+        self._candidate = None
+
+        self.state = best_state[:]
+        self.best_state, self.best_energy = best_state, best_energy
+        if self.save_state_on_exit:
+            self.save_state()
+
+        # Return best state and energy
+        return best_state, best_energy
+
+    def set_budget(
+        self,
+        start: Optional[float] = None,
+        deadline: Optional[float] = None,
+        max_evaluations: Optional[int] = None,
+        on_improvement: Optional[Callable[[Solution, float], Any]] = None,
+        cancel: Optional[Any] = None,
+    ) -> None:
+        """
+        Set the budget of the annealing. When the deadline (time.time()) passes, max_evaluations states are
+        evaluated, or the cancel event is set, BudgetExhaustedException is raised from the next move.
+        on_improvement(solution, elapsed) is called whenever a better state is found, where elapsed is the time
+        from the start.
+        """
+        if start is not None:
+            self._start = start
+        self._deadline = deadline
+        self._max_evaluations = max_evaluations
+        self._on_improvement = on_improvement
+        self._cancel = cancel
+
+    def fit_schedule(self, schedule: Dict) -> Dict:
+        """
+        Reduce the steps of an annealing schedule to fit in the remaining budget. The speed of steps is given by
+        the schedule, or estimated from the evaluations so far.
+        """
+        schedule = dict(schedule)
+        if self._deadline is not None:
+            speed = schedule.get("speed", self._evaluations / max(time.time() - self._start, sys.float_info.epsilon))
+            schedule["steps"] = min(schedule["steps"], int(speed * max(self._deadline - time.time(), 0)))
+        if self._max_evaluations is not None:
+            schedule["steps"] = min(schedule["steps"], max(self._max_evaluations - self._evaluations, 0))
+        return schedule
+
+    def refinement_schedule(self, minutes: float) -> Dict:
+        """
+        Estimates a schedule of annealing at low temperatures for the given minutes, to refine the current state.
+        The smallest uphill move of random moves is accepted with probability 0.1 at the start.
+        """
+        start = time.time()
+        deltas = sorted([d for d in self.sample_energy_deltas(n_samples=100) if 0 < d])
+        speed = 100 / max(time.time() - start, sys.float_info.epsilon)  # Moves per second
+
+        tmax = -deltas[0] / math.log(0.1) if deltas else 1.0
+        return {"tmax": tmax, "tmin": tmax / 100, "steps": int(speed * 60.0 * minutes), "updates": self.updates}
+
+    @property
+    def best_so_far(self) -> Tuple[List[int], float]:
+        """
+        The best state evaluated so far with its energy.
+        """
+        if self._best is None:
+            self._accepted()
+        assert self._best is not None
+        return self._best
+
+    def to_solution(self, state: List[int]) -> Solution:
+        """
+        Convert a state to a Solution object.
+        """
+        gp, gn, rotations = self.retrieve_pairs(n=self.problem.n, state=state)
+        seqpair = SequencePair(pair=(gp, gn))
+        floorplan = seqpair.decode(problem=self.problem, rotations=rotations)
+        return Solution(sequence_pair=seqpair, floorplan=floorplan, rotations=rotations)
+
+    def energy(self) -> float:
+        """
+        Calculates the energy of the current state.
+        """
+        if (self._candidate is not None) and (self.state is self._candidate[0]):
+            return self._candidate[1]
+        return self._accepted()[1]
+
+    def _accepted(self) -> Tuple[List[int], float, Tuple]:
+        """
+        Returns the state accepted by simanneal with its energy and bounding box.
+        When simanneal accepts a move, it keeps the state object made by the move. Otherwise, it restores a copy of
+        the previous state. So, a state is decoded here only when it is neither of them.
+        """
+        if (self._candidate is not None) and (self._current is not None):
+            self._record_acceptance(
+                accepted=self.state is self._candidate[0], delta=self._candidate[1] - self._current[1]
+            )
+        if (self._candidate is not None) and (self.state is self._candidate[0]):
+            self._current = (self.state[:], self._candidate[1], self._candidate[2])
+            self._commit()
+        elif (self._current is None) or (self.state != self._current[0]):
+            self._current = (self.state[:], *self._evaluate())
+            self._improve(state=self._current[0], energy=self._current[1])
+        self._candidate = None
+        return self._current
+
+    def move(self) -> float:
+        """
+        Move state (sequence-pair) and return the energy diff.
+        This is called by simanneal (in auto), which keeps the moved state if accepted, or restores a copy of the
+        previous state.
+        """
+        _, initial_energy, _ = self._accepted()
+        energy, bounding_box = self._apply_move()
+        self._set_candidate(energy=energy, bounding_box=bounding_box)
+        return energy - initial_energy
+
+    def _apply_move(self) -> Tuple[float, Tuple]:
+        """
+        Apply a move to the accepted state in place, and return the energy and the bounding box of the moved state.
+        The move can be undone by _undo, or committed by _commit. Implemented by each strategy (Hard/Soft).
+        """
+        raise NotImplementedError(f"{type(self).__name__} must implement _apply_move.")
+
+    def _commit(self) -> None:
+        """
+        Commit the last move applied to the state, so that the next moves are evaluated from it.
+        """
+        if self._candidate_cached:
+            # The candidate found in the cache is evaluated incrementally (without the limits) to be committed
+            gp, gn, rotations = self.retrieve_pairs(n=self.problem.n, state=self.state)
+            self._decoder.evaluate(gp=gp, gn=gn, rotations=rotations, **self._candidate_move)
+        self._decoder.commit()
+
+    def _undo(self) -> None:
+        """
+        Undo the last move applied to the state in place.
+        """
+        kind, a, b, c, d, r = self._undo_record
+        state = self.state
+        if kind == 0:
+            state[a], state[b] = state[b], state[a]
+            state[c], state[d] = state[d], state[c]
+        elif kind == 1:
+            state.insert(a, state.pop(b))
+        else:
+            state[a : b + 1] = reversed(state[a : b + 1])
+        if 0 <= r:
+            state[r] ^= 1
+
+    def move_info(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the statistics of the moves: the numbers of selected and accepted moves, and the current probability
+        of the selection for each move.
+        """
+        probabilities = self._move_probabilities()
+        return {
+            m: {
+                "selected": self._move_selected[k],
+                "accepted": self._move_accepted[k],
+                "probability": probabilities[k],
+            }
+            for k, m in enumerate(self._moves)
+        }
+
+    def _move_probabilities(self) -> List[float]:
+        """
+        The probabilities of selecting the moves.
+        """
+        n_moves = len(self._moves)
+        total = sum(self._move_rates)
+        if total <= 0.0:
+            return [1.0 / n_moves] * n_moves
+        scale = 1.0 - n_moves * _MOVE_MIN_PROBABILITY
+        return [_MOVE_MIN_PROBABILITY + scale * rate / total for rate in self._move_rates]
+
+    def _random_move(self) -> Dict:
+        """
+        Selects a move adaptively, and applies it to the state in place. Returns the move.
+        """
+        k = 0
+        if 1 < len(self._moves):
+            r = random.random()
+            for p in self._move_probabilities():
+                r -= p
+                if r < 0.0:
+                    break
+                k += 1
+            k = min(k, len(self._moves) - 1)
+        self._last_move = k
+        self._move_selected[k] += 1
+        return self._move_functions[k]()
+
+    def _record_acceptance(self, accepted: bool, delta: float) -> None:
+        """
+        Count the decision of the last move, and update the rate of the move selected last, whether it is accepted
+        and changes the energy.
+        """
+        if accepted:
+            self._counters["accepted"] += 1
+            if delta < 0.0:
+                self._counters["improving"] += 1
+        else:
+            self._counters["rejected"] += 1
+        self._update_move_rate(accepted=accepted, reward=1.0 if accepted and (delta != 0.0) else 0.0)
+
+    def _update_move_rate(self, accepted: bool, reward: float) -> None:
+        """
+        Update the rate of the move selected last by the reward.
+        """
+        k = self._last_move
+        if k < 0:
+            return
+        self._last_move = -1
+        if accepted:
+            self._move_accepted[k] += 1
+        self._move_rates[k] += _MOVE_RATE_DECAY * (reward - self._move_rates[k])
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the statistics of the annealer as a dict: the number of energy evaluations, the numbers of accepted,
+        rejected, and improving moves, the time of decoding and of the trials violating the limits (in the hard
+        strategy, None unless profile is True), the annealing schedule with the final temperature, and the counters
+        of trials, moves, and the cache (if it is enabled).
+        """
+        stats: Dict[str, Any] = {
+            "evaluations": self._evaluations,
+            **self._counters,
+            "decode_time": self._timers["decode"] if self.profile else None,
+            "hard_rejection_time": self._timers["hard_rejection"] if self.profile else None,
+            "schedule": {
+                "tmax": self.Tmax,
+                "tmin": self.Tmin,
+                "steps": self.steps,
+                "final_temperature": self._final_temperature,
+            },
+            "trials": self.trial_info(),
+            "moves": self.move_info(),
+        }
+        if self._cache_size:
+            stats["cache"] = self.cache_info()
+        return stats
+
+    def trial_info(self) -> Dict[str, Any]:
+        """
+        Returns the counters of trials to find moves: moves, trials, max_trials, and histogram (the number of moves
+        with each number of trials).
+        """
+        return {
+            "moves": sum(self._trial_counts.values()),
+            "trials": sum([trials * count for trials, count in self._trial_counts.items()]),
+            "max_trials": max(self._trial_counts, default=0),
+            "histogram": dict(sorted(self._trial_counts.items())),
+        }
+
+    def _record_trials(self, trials: int) -> None:
+        """
+        Count a move found by the number of trials.
+        """
+        self._trial_counts[trials] = self._trial_counts.get(trials, 0) + 1
+
+    def cache_info(self) -> Dict[str, int]:
+        """
+        Returns the counters of the cache of decoded states: hits, misses, evictions, size, and maxsize.
+        """
+        return dict(self._cache_info, size=len(self._cache), maxsize=self._cache_size)
+
+    def _set_candidate(self, energy: float, bounding_box: Tuple) -> None:
+        """
+        Keep the state made by a move as the candidate of the next state.
+        """
+        self._candidate = (self.state, energy, bounding_box)
+        self._improve(state=self.state, energy=energy)
+
+    def _improve(self, state: List[int], energy: float) -> None:
+        """
+        Update the best state evaluated so far.
+        """
+        if (self._best is not None) and (self._best[1] <= energy):
+            return
+        self._best = (state[:], energy)
+        if self._on_improvement is not None:
+            self._on_improvement(self.to_solution(state=state), time.time() - self._start)
+
+    def _check_budget(self) -> None:
+        """
+        Raise BudgetExhaustedException, if the budget is exhausted.
+        """
+        if (self._max_evaluations is not None) and (self._max_evaluations <= self._evaluations):
+            raise BudgetExhaustedException
+        if (self._deadline is not None) and (self._deadline <= time.time() + self._decode_time):
+            raise BudgetExhaustedException
+        if (self._cancel is not None) and self._cancel.is_set():
+            raise BudgetExhaustedException
+
+    def _evaluate(self, move: Optional[Dict] = None) -> Tuple[float, Tuple]:
+        """
+        Calculates the energy and the bounding box of the current state. Implemented by each strategy (Hard/Soft).
         """
-        self._annealing_phase = True
-        if self._show_progress:
-            self._progress = tqdm(total=self.steps, desc="Progress")
-        return super().anneal()
+        raise NotImplementedError(f"{type(self).__name__} must implement _evaluate.")
+
+    def run_at_temperature(self, temperature: float, steps: int) -> Tuple[List[int], float]:
+        """
+        Run the Metropolis algorithm at a constant temperature, and return the best state with its energy.
+        The same acceptance criterion as simanneal is used, and moves are applied in place as in anneal.
+        """
+        _, prev_energy, bounding_box = self._accepted()
+        best_state, best_energy = self.state[:], prev_energy
+        try:
+            for _ in range(steps):
+                energy, candidate_bounding_box = self._apply_move()
+                self._improve(state=self.state, energy=energy)
+                delta = energy - prev_energy
+                if (0.0 < delta) and (math.exp(-delta / temperature) < random.random()):
+                    # Restore the previous state
+                    self._undo()
+                    self._record_acceptance(accepted=False, delta=delta)
+                else:
+                    self._commit()
+                    self._record_acceptance(accepted=True, delta=delta)
+                    prev_energy, bounding_box = energy, candidate_bounding_box
+                    if energy < best_energy:
+                        best_state, best_energy = self.state[:], energy
+        except BaseException:
+            self._current = None
+            raise
+        self._current = (self.state[:], prev_energy, bounding_box)
+        self._candidate = None
+
+        return (best_state, best_energy)
+
+    def sample_energy_deltas(self, n_samples: int, walk: bool = False) -> List[float]:
+        """
+        Returns the energy differences of random moves from the current state. The state is not changed.
+        If walk is True, every move is accepted and the next move is made from it, instead of the current state.
+        """
+        _, energy, _ = self._accepted()
+        state = self.state[:]
+        deltas = []
+        try:
+            for _ in range(n_samples):
+                candidate_energy, _ = self._apply_move()
+                self._improve(state=self.state, energy=candidate_energy)
+                deltas.append(candidate_energy - energy)
+                if walk:
+                    self._commit()
+                    energy = candidate_energy
+                else:
+                    self._undo()
+        finally:
+            if walk:
+                # The state is decoded again from scratch
+                self._current = None
+                self.state = state
+        self._accepted()
+
+        return deltas
+
+    def estimate_schedule(self, minutes: float, n_samples: int = 300) -> Dict:
+        """
+        Estimates a schedule of annealing for the given minutes from the energy differences of n_samples moves
+        in a random walk, instead of the exploratory annealing of auto().
+        At Tmax, uphill moves are accepted with probability 0.5 on average, and with probability 1e-8 at Tmin.
+        The speed (moves per second) in the sampling is also returned.
+        """
+        start = time.time()
+        deltas = sorted([d for d in self.sample_energy_deltas(n_samples=n_samples, walk=True) if 0 < d])
+        speed = n_samples / max(time.time() - start, sys.float_info.epsilon)  # Moves per second
+
+        tmax, tmin = 1.0, 0.01
+        if deltas:
+            tmax = self._temperature_for_acceptance(deltas=deltas, acceptance=0.5)
+            tmin = self._temperature_for_acceptance(deltas=deltas, acceptance=1e-8)
+        return {
+            "tmax": tmax,
+            "tmin": tmin,
+            "steps": int(speed * 60.0 * minutes),
+            "updates": self.updates,
+            "speed": speed,
+        }
+
+    @classmethod
+    def _temperature_for_acceptance(cls, deltas: List[float], acceptance: float) -> float:
+        """
+        Returns the temperature at which the uphill moves of the given energy differences are accepted with the
+        probability on average, found by bisection on the logarithm of the temperature.
+        """
+        low, high = math.log(deltas[0]) - 10.0, math.log(deltas[-1]) + 10.0
+        for _ in range(50):
+            middle = (low + high) / 2
+            t = math.exp(middle)
+            if sum([math.exp(-d / t) for d in deltas]) / len(deltas) < acceptance:
+                low = middle
+            else:
+                high = middle
+        return math.exp(high)
+
+    def _decode(self, move: Optional[Dict] = None, abort_on_limits: bool = False) -> Tuple:
+        """
+        Decodes the current state and returns the bounding box.
+        If the move from the accepted state is given, the state is decoded incrementally. Either way, the decoder
+        is given G_{+}, G_{-}, and rotations as new lists sliced from the state (see retrieve_pairs).
+        The first state is always decoded, and the others are decoded within the budget.
+        If abort_on_limits is True, the incremental decoding is aborted as soon as the width/height limit is
+        exceeded, and then the bounding box only tells that the limit is exceeded.
+        """
+        if self._best is not None:
+            self._check_budget()
+        self._evaluations += 1
+        self._candidate_cached = False
+
+        key = 0
+        if self._cache_size:
+            key = self._cache_key(state=self.state)
+            if (move is not None) and (key in self._cache):
+                self._cache_info["hits"] += 1
+                self._cache.move_to_end(key)
+                self._candidate_cached = True
+                self._candidate_move = move
+                return self._cache[key][:2]
+            self._cache_info["misses"] += 1
+
+        gp, gn, rotations = self.retrieve_pairs(n=self.problem.n, state=self.state)
+        start = time.perf_counter() if (self.profile or (move is None)) else 0.0
+        if move is None:
+            bounding_box = self._decoder.reset(gp=gp, gn=gn, rotations=rotations)
+            self._decode_time = time.perf_counter() - start
+        else:
+            width_limit, height_limit = None, None
+            if abort_on_limits:
+                if self.width_limit < sys.float_info.max:
+                    width_limit = self.width_limit
+                if self.height_limit < sys.float_info.max:
+                    height_limit = self.height_limit
+            bounding_box = self._decoder.evaluate(
+                gp=gp, gn=gn, rotations=rotations, width_limit=width_limit, height_limit=height_limit, **move
+            )
+        if self.profile:
+            self._timers["decode"] += time.perf_counter() - start
+
+        if self._cache_size:
+            self._cache[key] = (bounding_box[0], bounding_box[1], bounding_box[0] * bounding_box[1])
+            self._cache.move_to_end(key)
+            if self._cache_size < len(self._cache):
+                self._cache.popitem(last=False)
+                self._cache_info["evictions"] += 1
+
+        return bounding_box
+
+    @classmethod
+    def _cache_key(cls, state: List[int]) -> int:
+        """
+        A compact key of a state for the cache: the hash of the state.
+        Collisions of 64-bit hashes are negligible for caches of practical sizes.
+        """
+        return hash(tuple(state))
+
+    def _choose_indices(self) -> Tuple[int, int, int]:
+        """
+        Chooses G_{+} or G_{-} (the offset in the state), and two different indices in it.
+        If the moves are focused, the rectangle at the first index is in the focus.
+        """
+        n = self.problem.n
+        offset = random.randint(0, 1) * n  # Choose G_{+} (=0) or G_{-} (=1)
+        if self.focus is None:
+            i = random.randrange(n)
+        else:
+            i = self.state.index(random.choice(self.focus), offset, offset + n) - offset
+        j = random.randrange(n - 1)
+        if i <= j:
+            j += 1
+        return (offset, i, j)
+
+    def _swap_and_rotate(self) -> Dict:
+        """
+        Swaps two rectangles in G_{+} or G_{-} of the state in place, and may rotate the first one. Returns the move.
+        The move is recorded to be undone by _undo.
+        """
+        n = self.problem.n
+        state = self.state
+        offset, i, j = self._choose_indices()
+
+        # Swap them (i != j always holds true)
+        state[i + offset], state[j + offset] = state[j + offset], state[i + offset]
+        undo_record = self._undo_record
+        undo_record[0], undo_record[1], undo_record[2], undo_record[5] = 0, i + offset, j + offset, -1
+        undo_record[3] = undo_record[4] = 0
+        move: Dict = {"gp_range": None, "gn_range": None, "rotated": ()}
+        move["gp_range" if offset == 0 else "gn_range"] = (min(i, j), max(i, j))
+
+        # Random rotation of the rectangle moved from i
+        a = state[j + offset]
+        if self.problem.rotatable[a]:
+            if random.randint(0, 1) == 1:
+                state[a + 2 * n] ^= 1
+                undo_record[5] = a + 2 * n
+                move["rotated"] = (a,)
+
+        return move
+
+    def _exchange_move(self) -> Dict:
+        """
+        Exchanges two rectangles in both G_{+} and G_{-} of the state in place. Returns the move.
+        """
+        n = self.problem.n
+        a = random.randrange(n) if self.focus is None else random.choice(self.focus)
+        b = random.randrange(n - 1)
+        if a <= b:
+            b += 1
+        return self._exchange_rectangles(a, b)
+
+    def _exchange_rectangles(self, a: int, b: int) -> Dict:
+        """
+        Exchanges the rectangles a and b in both G_{+} and G_{-} of the state in place. Returns the move.
+        """
+        n = self.problem.n
+        state = self.state
+        pa, pb = state.index(a, 0, n), state.index(b, 0, n)
+        na, nb = state.index(a, n, 2 * n), state.index(b, n, 2 * n)
+        state[pa], state[pb] = b, a
+        state[na], state[nb] = b, a
+        self._undo_record[:] = [0, pa, pb, na, nb, -1]
+        return {"gp_range": (min(pa, pb), max(pa, pb)), "gn_range": (min(na, nb) - n, max(na, nb) - n), "rotated": ()}
+
+    def _shift_move(self) -> Dict:
+        """
+        Shifts a rectangle in G_{+} or G_{-} of the state in place: removes it from an index and inserts it at another
+        index. Returns the move.
+        """
+        state = self.state
+        offset, i, j = self._choose_indices()
+        state.insert(j + offset, state.pop(i + offset))
+        self._undo_record[:] = [1, i + offset, j + offset, 0, 0, -1]
+        move: Dict = {"gp_range": None, "gn_range": None, "rotated": ()}
+        move["gp_range" if offset == 0 else "gn_range"] = (min(i, j), max(i, j))
+        return move
+
+    def _rotate_move(self) -> Dict:
+        """
+        Rotates a rectangle in the state in place. Returns the move.
+        If no rectangle can be rotated, two rectangles are swapped instead.
+        """
+        candidates = self._rotatable_ids
+        if self.focus is not None:
+            candidates = [i for i in self.focus if self.problem.rotatable[i]]
+        if not candidates:
+            return self._swap_and_rotate()
+        return self._rotate_rectangle(random.choice(candidates))
+
+    def _rotate_rectangle(self, a: int) -> Dict:
+        """
+        Rotates the rectangle a in the state in place. Returns the move.
+        """
+        r = a + 2 * self.problem.n
+        self.state[r] ^= 1
+        self._undo_record[:] = [0, 0, 0, 0, 0, r]
+        return {"gp_range": None, "gn_range": None, "rotated": (a,)}
+
+    def _reverse_move(self) -> Dict:
+        """
+        Reverses a block of rectangles in G_{+} or G_{-} of the state in place. Returns the move.
+        """
+        state = self.state
+        offset, i, j = self._choose_indices()
+        i, j = min(i, j), max(i, j)
+        state[i + offset : j + offset + 1] = reversed(state[i + offset : j + offset + 1])
+        self._undo_record[:] = [2, i + offset, j + offset, 0, 0, -1]
+        move: Dict = {"gp_range": None, "gn_range": None, "rotated": ()}
+        move["gp_range" if offset == 0 else "gn_range"] = (i, j)
+        return move
 
     @classmethod
     def retrieve_pairs(cls, n: int, state: List[int]) -> Tuple[List[int], List[int], List[int]]:
         """
-        Retrieve G_{+}, G_{-}, and rotations from a state.
+        Retrieve G_{+}, G_{-}, and rotations from a state, as new lists (slices of the state).
         """
         gp = state[0:n]
         gn = state[n : 2 * n]
@@ -256,57 +1757,86 @@ class RectanglePackingProblemAnnealerHard(RectanglePackingProblemAnnealer):
     HardToFindSolutionException.
     """
 
-    def move(self) -> float:
+    def _apply_move(self) -> Tuple[float, Tuple]:
         """
-        Move state (sequence-pair) and return the energy diff.
+        Move state (sequence-pair) in place and return the energy and the bounding box.
+        The first trial is a random move. If it violates the width/height limit, the next trials are the moves which
+        cannot violate them (see _feasible_move), when they are found.
         """
-        initial_energy: float = self.energy()
-        initial_state: List[int] = self.state[:]
-
         # Maximum the number of trial: 10000
-        for _ in range(10000):
-            # Choose two indices and swap them
-            i, j = random.sample(range(self.problem.n), k=2)  # The first and second index
-            offset = random.randint(0, 1) * self.problem.n  # Choose G_{+} (=0) or G_{-} (=1)
-
-            # Swap them (i != j always holds true)
-            self.state[i + offset], self.state[j + offset] = initial_state[j + offset], initial_state[i + offset]
-
-            # Random rotation
-            if self.problem.rectangles[i]["rotatable"]:
-                if random.randint(0, 1) == 1:
-                    self.state[i + 2 * self.problem.n] = initial_state[i + 2 * self.problem.n] + 1
+        for trial in range(10000):
+            start = time.perf_counter() if self.profile else 0.0
+            move = None
+            if 0 < trial:
+                move = self._feasible_move()
+            if move is None:
+                move = self._random_move()
 
             # We adopt solution if the solution width/height limit is satisfied
-            energy = self.energy()
+            energy, bounding_box = self._evaluate(move=move)
             if energy < sys.float_info.max:
-                break
+                self._record_trials(trial + 1)
+                return (energy, bounding_box)
 
             # Restore the state
-            self.state = initial_state[:]
+            self._undo()
+            self._update_move_rate(accepted=False, reward=0.0)
+            if self.profile:
+                self._timers["hard_rejection"] += time.perf_counter() - start
 
-        else:
-            raise HardToFindSolutionException
+        raise HardToFindSolutionException
 
-        return energy - initial_energy
+    def _feasible_move(self) -> Optional[Dict]:
+        """
+        Samples a move which cannot violate the width/height limit, and applies it to the state in place. Returns
+        the move, or None if it is not found in n samples.
+        The move exchanges two rectangles in both G_{+} and G_{-}, or rotates a rectangle. Then, the longest paths
+        through the rectangle are changed by the differences of the widths/heights, and the others are kept.
+        So, the move is feasible if the changed paths through the rectangles are within the limits.
+        """
+        n = self.problem.n
+        if n < 2:
+            return None
+        state = self.state
+        widths, heights, rotatable = self.problem.widths, self.problem.heights, self.problem.rotatable
+        through_h, through_v = self._decoder.longest_paths_through()
+        if (self.width_limit < max(through_h)) or (self.height_limit < max(through_v)):
+            # The accepted state violates the limit
+            return None
 
-    def energy(self) -> float:
+        for _ in range(n):
+            a, b = random.sample(range(n), k=2)
+            wa, ha = (widths[a], heights[a]) if state[a + 2 * n] % 2 == 0 else (heights[a], widths[a])
+            if rotatable[a] and random.randint(0, 1) == 1:
+                # Rotate a
+                if (self.width_limit < through_h[a] + ha - wa) or (self.height_limit < through_v[a] + wa - ha):
+                    continue
+                return self._rotate_rectangle(a)
+
+            # Exchange a and b
+            wb, hb = (widths[b], heights[b]) if state[b + 2 * n] % 2 == 0 else (heights[b], widths[b])
+            if (self.width_limit < through_h[a] + wb - wa) or (self.width_limit < through_h[b] + wa - wb):
+                continue
+            if (self.height_limit < through_v[a] + hb - ha) or (self.height_limit < through_v[b] + ha - hb):
+                continue
+            return self._exchange_rectangles(a, b)
+
+        return None
+
+    def _evaluate(self, move: Optional[Dict] = None) -> Tuple[float, Tuple]:
         """
         Calculates the area of bounding box.
         """
-
-        # Pick up sequence-pair and rotations from state
-        gp, gn, rotations = self.retrieve_pairs(n=self.problem.n, state=self.state)
-        seqpair = SequencePair(pair=(gp, gn))
-        floorplan = seqpair.decode(problem=self.problem, rotations=rotations)
+        # The area of an infeasible state is not needed, and the decoding is aborted when the limit is exceeded
+        bounding_box = self._decode(move=move, abort_on_limits=True)
 
         # Returns float max, if width/height limit is not satisfied
-        if floorplan.bounding_box[0] > self.width_limit:
-            return sys.float_info.max
-        if floorplan.bounding_box[1] > self.height_limit:
-            return sys.float_info.max
+        if bounding_box[0] > self.width_limit:
+            return (sys.float_info.max, bounding_box)
+        if bounding_box[1] > self.height_limit:
+            return (sys.float_info.max, bounding_box)
 
-        return float(floorplan.area)
+        return (float(bounding_box[0] * bounding_box[1]), bounding_box)
 
 
 class RectanglePackingProblemAnnealerSoft(RectanglePackingProblemAnnealer):
@@ -316,50 +1846,42 @@ class RectanglePackingProblemAnnealerSoft(RectanglePackingProblemAnnealer):
     solution violating constraints.
     """
 
-    def move(self) -> float:
+    def _apply_move(self) -> Tuple[float, Tuple]:
         """
-        Move state (sequence-pair) and return the energy diff.
+        Move state (sequence-pair) in place and return the energy and the bounding box.
         """
-        initial_energy: float = self.energy()
-        initial_state: List[int] = self.state[:]
-
-        # Choose two indices and swap them
-        i, j = random.sample(range(self.problem.n), k=2)  # The first and second index
-        offset = random.randint(0, 1) * self.problem.n  # Choose G_{+} (=0) or G_{-} (=1)
-
-        # Swap them (i != j always holds true)
-        self.state[i + offset], self.state[j + offset] = initial_state[j + offset], initial_state[i + offset]
-
-        # Random rotation
-        if self.problem.rectangles[i]["rotatable"]:
-            if random.randint(0, 1) == 1:
-                self.state[i + 2 * self.problem.n] = initial_state[i + 2 * self.problem.n] + 1
+        move = self._random_move()
 
         # A solution whose width/height limit is not satisfied has a larger energy.
         # We would like to adopt a valid solution as the annealing steps proceeds.
-        energy = self.energy()
-
-        return energy - initial_energy
+        energy, bounding_box = self._evaluate(move=move)
+        self._record_trials(1)
+        return (energy, bounding_box)
 
-    def energy(self) -> float:
+    def _evaluate(self, move: Optional[Dict] = None) -> Tuple[float, Tuple]:
         """
         Calculates the area of bounding box.
         """
-
-        # Pick up sequence-pair and rotations from state
-        gp, gn, rotations = self.retrieve_pairs(n=self.problem.n, state=self.state)
-        seqpair = SequencePair(pair=(gp, gn))
-        floorplan = seqpair.decode(problem=self.problem, rotations=rotations)
+        bounding_box = self._decode(move=move)
 
         # Returns the max possible area, if width/height limit is not satisfied.
         # This solution could be chosen in the earlier steps of the annealing,
         # but would not be chosen in the later steps.
-        if floorplan.bounding_box[0] > self.width_limit:
-            return self.max_possible_width * self.max_possible_height + floorplan.area
-        if floorplan.bounding_box[1] > self.height_limit:
-            return self.max_possible_width * self.max_possible_height + floorplan.area
+        area = bounding_box[0] * bounding_box[1]
+        if bounding_box[0] > self.width_limit:
+            return (self.max_possible_width * self.max_possible_height + area, bounding_box)
+        if bounding_box[1] > self.height_limit:
+            return (self.max_possible_width * self.max_possible_height + area, bounding_box)
 
-        return float(floorplan.area)
+        return (float(area), bounding_box)
+
+
+class BudgetExhaustedException(Exception):
+    """
+    When the budget of the annealing is exhausted, this exception is raised.
+    """
+
+    pass
 
 
 class HardToFindSolutionException(Exception):
@@ -12,75 +12,399 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Tuple
-
-import matplotlib.patches as patches
-from matplotlib import pylab as plt
+import itertools
+import math
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
 
 from .solution import Solution
 
+# The colors of rectangles (the "tab10" colormap of matplotlib), which are used in turn
+COLORS = [
+    "#1f77b4",
+    "#ff7f0e",
+    "#2ca02c",
+    "#d62728",
+    "#9467bd",
+    "#8c564b",
+    "#e377c2",
+    "#7f7f7f",
+    "#bcbd22",
+    "#17becf",
+]
+
+
+def _warm_up() -> None:
+    """
+    Import matplotlib with a non-interactive backend and draw a figure in a worker process, so that the floorplans
+    rendered in it do not pay for the import and the font cache.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from matplotlib import pylab as plt
+
+    fig = plt.figure()
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def _render(task: Dict) -> str:
+    """
+    Draw a floorplan in a worker process, and return the path.
+    """
+    Visualizer().visualize(task["solution"], path=task["path"], title=task["title"], labels=task["labels"])
+    path: str = task["path"]
+    return path
+
+
+def _zip_paths(solutions: Iterable[Solution], paths: Iterable[str]) -> Iterator[Tuple[Solution, str]]:
+    """
+    Pairs solutions with paths, which must be of the same length.
+    """
+    for solution, path in itertools.zip_longest(solutions, paths):
+        if (solution is None) or (path is None):
+            raise ValueError("'solutions' and 'paths' must be of the same length.")
+        yield (solution, path)
+
+
+def _zip_titles(solutions: Iterable[Solution], titles: Optional[Iterable[str]]) -> Iterator[Tuple[Solution, str]]:
+    """
+    Pairs solutions with titles ("Floorplan #<index>" by default), which must be of the same length.
+    """
+    if titles is None:
+        for index, solution in enumerate(solutions):
+            yield (solution, f"Floorplan #{index}")
+        return
+    for solution, title in itertools.zip_longest(solutions, titles):
+        if (solution is None) or (title is None):
+            raise ValueError("'solutions' and 'titles' must be of the same length.")
+        yield (solution, title)
+
 
 class Visualizer:
     """
     A floorplan visualizer.
+    matplotlib is imported when a floorplan is drawn by it, since it is slow to import. SVG files are written
+    without matplotlib.
     """
 
     def __init__(self) -> None:
-        # Default font size is 12
-        plt.rcParams["font.size"] = 14
+        pass
 
-    def visualize(self, solution: Solution, path: str = "floorplan.png", title: str = "Floorplan") -> None:
+    def visualize(
+        self,
+        solution: Solution,
+        path: str = "floorplan.png",
+        title: str = "Floorplan",
+        labels: Optional[bool] = None,
+    ) -> None:
+        """
+        Draws the floorplan of a solution with matplotlib, and saves it to the path (or shows it if path is None).
+        The rectangles are drawn as a collection. If labels is None, the IDs of rectangles are drawn only on the
+        rectangles large enough to hold them, and if labels is True (or False), they are always (or never) drawn.
+        """
         if not isinstance(solution, Solution):
             raise TypeError("Invalid argument: 'solution' must be an instance of Solution.")
 
-        positions = solution.floorplan.positions
-        bounding_box = solution.floorplan.bounding_box
+        from matplotlib import pylab as plt
+
+        fig = self._figure(solution, title=title, labels=labels)
+
+        # Output
+        if path is None:
+            plt.show()
+        else:
+            fig.savefig(path)
+
+        plt.close(fig)
+
+    def save_pdf(
+        self,
+        solutions: Iterable[Solution],
+        path: str = "floorplans.pdf",
+        titles: Optional[Iterable[str]] = None,
+        labels: Optional[bool] = None,
+    ) -> int:
+        """
+        Saves the floorplans of solutions to a multi-page PDF file, one floorplan per page, with the titles
+        ("Floorplan #<index>" by default). Returns the number of pages.
+        """
+        from matplotlib import pylab as plt
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        pages = 0
+        with PdfPages(path) as pdf:
+            for index, (solution, title) in enumerate(_zip_titles(solutions, titles)):
+                if not isinstance(solution, Solution):
+                    raise TypeError("Invalid argument: 'solutions' must be solutions.")
+                fig = self._figure(solution, title=title, labels=labels)
+                pdf.savefig(fig)
+                plt.close(fig)
+                pages += 1
+        return pages
+
+    def save_atlas(
+        self,
+        solutions: Iterable[Solution],
+        path: str = "floorplans.png",
+        columns: Optional[int] = None,
+        cell_size: float = 3.0,
+        titles: Optional[Iterable[str]] = None,
+        labels: Optional[bool] = None,
+    ) -> int:
+        """
+        Saves the floorplans of solutions to an image (a sprite atlas), where they are laid out in a grid of columns
+        (the square root of the number of solutions by default) with cells of cell_size inches. If the path ends
+        with ".svg", the atlas is written without matplotlib, with cells of cell_size * 100 pixels.
+        Returns the number of floorplans.
+        """
+        entries = list(_zip_titles(solutions, titles))
+        if not entries:
+            raise ValueError("'solutions' must not be empty.")
+        if any([not isinstance(solution, Solution) for solution, _ in entries]):
+            raise TypeError("Invalid argument: 'solutions' must be solutions.")
+        if columns is None:
+            columns = math.ceil(math.sqrt(len(entries)))
+        if columns < 1:
+            raise ValueError("'columns' must be a positive integer.")
+        if not (0 < cell_size):
+            raise ValueError("'cell_size' must be a positive number.")
+        rows = math.ceil(len(entries) / columns)
+
+        if path.lower().endswith(".svg"):
+            cell = cell_size * 100.0
+            lines = [
+                '<svg xmlns="http://www.w3.org/2000/svg" '
+                + f'width="{columns * cell:.2f}" height="{rows * cell:.2f}" '
+                + f'viewBox="0 0 {columns * cell:.2f} {rows * cell:.2f}">',
+                '<rect width="100%" height="100%" fill="#ffffff"/>',
+            ]
+            for index, (solution, title) in enumerate(entries):
+                # Each floorplan is fit in its cell by the viewBox
+                body, width, height = self._svg_body(solution, title=title, width=cell, labels=labels)
+                lines.append(
+                    f'<svg x="{index % columns * cell:.2f}" y="{index // columns * cell:.2f}" '
+                    + f'width="{cell:.2f}" height="{cell:.2f}" viewBox="0 0 {width:.2f} {height:.2f}">'
+                )
+                lines.extend(body)
+                lines.append("</svg>")
+            lines.append("</svg>")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            return len(entries)
+
+        from matplotlib import pylab as plt
+
+        fig, axes = plt.subplots(rows, columns, figsize=(columns * cell_size, rows * cell_size), squeeze=False)
+        for index, ax in enumerate(axes.flat):
+            if index < len(entries):
+                solution, title = entries[index]
+                self._draw(fig, ax, solution, title=title, labels=labels, fontsize=8)
+            else:
+                ax.axis("off")
+        fig.tight_layout()
+        fig.savefig(path)
+        plt.close(fig)
+        return len(entries)
+
+    def render_many(
+        self,
+        solutions: Iterable[Solution],
+        paths: Iterable[str],
+        n_workers: int = 1,
+        max_pending: Optional[int] = None,
+        title: str = "Floorplan",
+        labels: Optional[bool] = None,
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Draws the floorplans of solutions to the paths, and yields pairs of the index and the path as they are
+        finished. The floorplans are drawn in n_workers processes (see RenderQueue), and at most max_pending
+        (2 * n_workers by default) solutions are taken before their floorplans are finished.
+        """
+        if n_workers < 1:
+            raise ValueError("'n_workers' must be a positive integer.")
+
+        if n_workers == 1:
+            for index, (solution, path) in enumerate(_zip_paths(solutions, paths)):
+                self.visualize(solution, path=path, title=title, labels=labels)
+                yield (index, path)
+            return
+
+        if max_pending is None:
+            max_pending = 2 * n_workers
+        if max_pending < 1:
+            raise ValueError("'max_pending' must be a positive integer.")
+        with RenderQueue(n_workers=n_workers) as queue:
+            pending: Dict[Future, int] = {}  # Futures of paths with the indices of solutions
+            for index, (solution, path) in enumerate(_zip_paths(solutions, paths)):
+                pending[queue.submit(solution, path=path, title=title, labels=labels)] = index
+                if len(pending) < max_pending:
+                    continue
+
+                # Backpressure: wait for a floorplan before taking the next solution
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield (pending.pop(future), future.result())
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield (pending.pop(future), future.result())
+
+    def _figure(self, solution: Solution, title: str, labels: Optional[bool]) -> Any:
+        """
+        Creates a figure of the floorplan of a solution.
+        """
+        from matplotlib import pylab as plt
+
+        # Default font size is 12
+        plt.rcParams["font.size"] = 14
 
         # Figure settings
-        bb_width = bounding_box[0]
-        bb_height = bounding_box[1]
+        bb_width, bb_height = solution.floorplan.bounding_box
         fig = plt.figure(figsize=(10, 10 * bb_height / bb_width + 0.5))
-        ax = plt.axes()
+        ax = fig.add_subplot()
+        self._draw(fig, ax, solution, title=title, labels=labels)
+        return fig
+
+    def _draw(
+        self, fig: Any, ax: Any, solution: Solution, title: str, labels: Optional[bool], fontsize: float = 18
+    ) -> None:
+        """
+        Draws the floorplan of a solution on the axes of a figure.
+        """
+        from matplotlib.collections import PolyCollection
+
+        positions = solution.floorplan.positions
+        bb_width, bb_height = solution.floorplan.bounding_box
         ax.set_aspect("equal")
-        plt.xlim([0, bb_width])
-        plt.ylim([0, bb_height])
-        plt.xlabel("X")
-        plt.ylabel("Y")
-        plt.title(title)
+        ax.set_xlim([0, bb_width])
+        ax.set_ylim([0, bb_height])
+        ax.set_xlabel("X")
+        ax.set_ylabel("Y")
+        ax.set_title(title)
 
-        # Plot every rectangle
+        # Plot all the rectangles at once
+        palette = [self.get_color(k) for k in range(len(COLORS))]
+        vertices = []
+        facecolors = []
         for i, rectangle in enumerate(positions):
-            color, fontcolor = self.get_color(i)
-            r = patches.Rectangle(
-                xy=(rectangle["x"], rectangle["y"]),
-                width=rectangle["width"],
-                height=rectangle["height"],
-                edgecolor="#000000",
-                facecolor=color,
-                alpha=1.0,
-                fill=True,
+            x, y, width, height = rectangle["x"], rectangle["y"], rectangle["width"], rectangle["height"]
+            vertices.append([(x, y), (x + width, y), (x + width, y + height), (x, y + height)])
+            facecolors.append(palette[i % len(palette)][0])
+        ax.add_collection(PolyCollection(vertices, facecolors=facecolors, edgecolors="#000000", alpha=1.0))
+
+        # Add text labels
+        extent = ax.get_window_extent()
+        scale = min(extent.width / bb_width, extent.height / bb_height) * 72.0 / fig.dpi  # Points per unit
+        for i, rectangle in enumerate(positions if labels is not False else []):
+            label = str(rectangle["id"])
+            if (labels is None) and not self._label_fits(rectangle, label, scale, fontsize):
+                continue
+            ax.text(
+                x=rectangle["x"] + rectangle["width"] / 2,
+                y=rectangle["y"] + rectangle["height"] / 2,
+                s=label,
+                fontsize=fontsize,
+                color=palette[i % len(palette)][1],
+                ha="center",
+                va="center",
             )
-            ax.add_patch(r)
 
-            # Add text label
-            centering_offset = 0.011
-            center_x = rectangle["x"] + rectangle["width"] / 2 - bb_width * centering_offset
-            center_y = rectangle["y"] + rectangle["height"] / 2 - bb_height * centering_offset
-            ax.text(x=center_x, y=center_y, s=rectangle["id"], fontsize=18, color=fontcolor)
+    def to_svg(
+        self, solution: Solution, title: str = "Floorplan", width: float = 800.0, labels: Optional[bool] = None
+    ) -> str:
+        """
+        Returns the floorplan of a solution as an SVG document, where the floorplan is drawn width pixels wide.
+        This does not need matplotlib. The labels are drawn in the same way as visualize.
+        """
+        if not isinstance(solution, Solution):
+            raise TypeError("Invalid argument: 'solution' must be an instance of Solution.")
+        if not (0 < width):
+            raise ValueError("'width' must be a positive number.")
 
-        # Output
-        if path is None:
-            plt.show()
-        else:
-            fig.savefig(path)
+        body, svg_width, svg_height = self._svg_body(solution, title=title, width=width, labels=labels)
+        lines = [
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            + f'width="{svg_width:.2f}" height="{svg_height:.2f}" viewBox="0 0 {svg_width:.2f} {svg_height:.2f}">'
+        ]
+        lines.extend(body)
+        lines.append("</svg>")
+        return "\n".join(lines) + "\n"
+
+    def _svg_body(
+        self, solution: Solution, title: str, width: float, labels: Optional[bool]
+    ) -> Tuple[List[str], float, float]:
+        """
+        Returns the SVG elements of the floorplan of a solution, with the width and height of the drawing.
+        """
+        positions = solution.floorplan.positions
+        bb_width, bb_height = solution.floorplan.bounding_box
+        scale = width / bb_width if 0 < bb_width else 1.0  # Pixels per unit
+        height = bb_height * scale
+        margin = 10.0
+        title_size = 20.0
+        fontsize = 14.0
+        top = margin + title_size + margin
+
+        lines: List[str] = [
+            '<rect width="100%" height="100%" fill="#ffffff"/>',
+            f'<text x="{margin + width / 2:.2f}" y="{margin + title_size:.2f}" font-size="{title_size:.0f}" '
+            + f'font-family="sans-serif" text-anchor="middle">{escape(title)}</text>',
+            f'<g transform="translate({margin:.2f},{top:.2f})" stroke="#000000" stroke-width="1">',
+        ]
+
+        # The y axis of SVG points downward
+        for i, rectangle in enumerate(positions):
+            x = rectangle["x"] * scale
+            y = (bb_height - rectangle["y"] - rectangle["height"]) * scale
+            lines.append(
+                f'<rect x="{x:.2f}" y="{y:.2f}" width="{rectangle["width"] * scale:.2f}" '
+                + f'height="{rectangle["height"] * scale:.2f}" fill="{COLORS[i % len(COLORS)]}"/>'
+            )
+        lines.append("</g>")
+
+        if labels is not False:
+            lines.append(
+                f'<g font-size="{fontsize:.0f}" font-family="sans-serif" text-anchor="middle" '
+                + f'dominant-baseline="central" transform="translate({margin:.2f},{top:.2f})">'
+            )
+            for i, rectangle in enumerate(positions):
+                label = str(rectangle["id"])
+                if (labels is None) and not self._label_fits(rectangle, label, scale, fontsize):
+                    continue
+                x = (rectangle["x"] + rectangle["width"] / 2) * scale
+                y = (bb_height - rectangle["y"] - rectangle["height"] / 2) * scale
+                color = self._font_color(COLORS[i % len(COLORS)])
+                lines.append(f'<text x="{x:.2f}" y="{y:.2f}" fill="{color}">{label}</text>')
+            lines.append("</g>")
 
-        plt.close()
+        return (lines, width + 2 * margin, top + height + margin)
+
+    def save_svg(
+        self,
+        solution: Solution,
+        path: str = "floorplan.svg",
+        title: str = "Floorplan",
+        width: float = 800.0,
+        labels: Optional[bool] = None,
+    ) -> None:
+        """
+        Saves the floorplan of a solution as an SVG file (see to_svg).
+        """
+        svg = self.to_svg(solution, title=title, width=width, labels=labels)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(svg)
 
     @classmethod
-    def get_color(cls, i: int = 0) -> Tuple[str, str]:
+    def get_color(cls, i: int = 0) -> Tuple[Any, str]:
         """
         Gets rectangle face color (and its font color) from matplotlib cmap.
         """
+        from matplotlib import pylab as plt
+
         cmap = plt.get_cmap("tab10")
         color = cmap(i % cmap.N)
         brightness = max(color[0], color[1], color[2])
@@ -91,3 +415,65 @@ class Visualizer:
             fontcolor = "#ffffff"
 
         return (color, fontcolor)
+
+    @classmethod
+    def _font_color(cls, color: str) -> str:
+        """
+        Gets the font color on a face color given as "#rrggbb", in the same way as get_color.
+        """
+        brightness = max(int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)) / 255
+        return "#000000" if 0.85 < brightness else "#ffffff"
+
+    @classmethod
+    def _label_fits(cls, rectangle: Dict, label: str, scale: float, fontsize: float) -> bool:
+        """
+        Whether a label in the font size fits in a rectangle drawn with the scale (points or pixels per unit).
+        The width of a character is estimated as 0.6 of the font size.
+        """
+        fits: bool = (0.6 * fontsize * len(label) <= rectangle["width"] * scale) and (
+            fontsize <= rectangle["height"] * scale
+        )
+        return fits
+
+
+class RenderQueue:
+    """
+    A queue drawing floorplans in the background, in n_workers worker processes.
+    Each worker imports matplotlib once when it is started, and it is reused for the floorplans drawn in it.
+    The queue should be closed (or used as a context manager) to wait for the floorplans and stop the workers.
+    """
+
+    def __init__(self, n_workers: int = 1) -> None:
+        if n_workers < 1:
+            raise ValueError("'n_workers' must be a positive integer.")
+
+        self.n_workers = n_workers
+        self._executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_warm_up)
+
+    def submit(
+        self, solution: Solution, path: str = "floorplan.png", title: str = "Floorplan", labels: Optional[bool] = None
+    ) -> Future:
+        """
+        Queue the floorplan of a solution to be drawn to the path (see Visualizer.visualize). Returns a future of
+        the path.
+        """
+        if not isinstance(solution, Solution):
+            raise TypeError("Invalid argument: 'solution' must be an instance of Solution.")
+        if path is None:
+            raise ValueError("'path' must be given to draw a floorplan in the background.")
+
+        # The positions are calculated here, since they may be given as a function
+        solution.floorplan.positions
+        return self._executor.submit(_render, {"solution": solution, "path": path, "title": title, "labels": labels})
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop the workers. If wait is True, wait for the queued floorplans to be drawn.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "RenderQueue":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
@@ -41,6 +41,7 @@ setuptools.setup(
         "simanneal>=0.5.0,<1.0.0",
         "matplotlib>=3.3.4,<4.0.0",
         "tqdm>=4.62.3,<5.0.0",
+        "numpy>=1.19.0,<3.0.0",
         "graphlib-backport>=1.0.3,<2.0.0",  # TODO: Drop this when we drop 3.8 support
     ],
     extras_require={
@@ -56,6 +57,11 @@ setuptools.setup(
             "mypy>=0.812,<1.0",
         ],
     },
+    entry_points={
+        "console_scripts": [
+            "rectangle-packing-benchmark=rectangle_packing_solver.benchmark.cli:main",
+        ],
+    },
     author="Kotaro Terada",
     author_email="kotarot@apache.org",
     url="https://github.com/kotarot/rectangle-packing-solver",
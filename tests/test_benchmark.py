@@ -0,0 +1,112 @@
+# Copyright 2022 Kotaro Terada
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import json
+
+import pytest
+
+from rectangle_packing_solver import benchmark
+from rectangle_packing_solver.benchmark.cli import main
+
+
+def test_benchmark_instances():
+    instances = list(benchmark.iter_instances(sizes=[10, 20]))
+    assert [name for name, _ in instances] == [
+        "random-10",
+        "random-20",
+        "near-square-10",
+        "near-square-20",
+        "slender-10",
+        "slender-20",
+        "many-duplicates-10",
+        "many-duplicates-20",
+    ]
+
+    # The instances are always the same
+    for name, problem in instances:
+        family, n = name.rsplit("-", 1)
+        other = benchmark.generate_instance(family, int(n))
+        assert problem.n == int(n)
+        assert list(problem.widths) == list(other.widths)
+        assert list(problem.heights) == list(other.heights)
+        assert all(problem.rotatable)
+
+    problem = benchmark.generate_instance("many-duplicates", 100)
+    assert len(set(zip(problem.widths, problem.heights))) <= 5
+
+    with pytest.raises(ValueError):
+        benchmark.generate_instance("unknown", 10)
+    with pytest.raises(ValueError):
+        benchmark.generate_instance("random", 0)
+
+
+def test_benchmark_run_and_compare(tmpdir):
+    results = benchmark.run_benchmark(families=["random", "slender"], sizes=[10], minutes=0.001)
+    assert results["instance_set_version"] == benchmark.INSTANCE_SET_VERSION
+    assert sorted(results["results"]) == ["random-10", "slender-10"]
+    assert 0 < results["startup"]["import_seconds"]
+    for metrics in results["results"].values():
+        assert metrics["n"] == 10
+        assert 0 < metrics["decode_per_sec"]
+        assert 0 < metrics["steps_per_sec"]
+        assert 0 < metrics["peak_memory_bytes"]
+        assert 1.0 <= metrics["area_ratio"]
+
+    path = str(tmpdir.join("results.json"))
+    benchmark.save_results(results, path)
+    assert benchmark.load_results(path) == json.loads(benchmark.format_results(results))
+    assert benchmark.compare_results(results, results) == []
+
+    # Slower, larger, and worse
+    current = copy.deepcopy(results)
+    current["results"]["random-10"]["steps_per_sec"] *= 0.5
+    current["results"]["random-10"]["peak_memory_bytes"] *= 2
+    current["results"]["slender-10"]["area_ratio"] *= 1.1
+    current["results"]["slender-10"]["decode_per_sec"] *= 0.95  # Within the tolerance
+    current["startup"]["import_seconds"] *= 2
+    regressions = benchmark.compare_results(results, current)
+    assert [(r["instance"], r["metric"]) for r in regressions] == [
+        ("startup", "import_seconds"),
+        ("random-10", "steps_per_sec"),
+        ("random-10", "peak_memory_bytes"),
+        ("slender-10", "area_ratio"),
+    ]
+
+    # The results without the startup metrics
+    baseline = copy.deepcopy(results)
+    del baseline["startup"]
+    assert len(benchmark.compare_results(baseline, current)) == 3
+
+    # The metrics missing from either of the results
+    del baseline["results"]["random-10"]["steps_per_sec"]
+    del current["results"]["slender-10"]["area_ratio"]
+    regressions = benchmark.compare_results(baseline, current)
+    assert [(r["instance"], r["metric"]) for r in regressions] == [("random-10", "peak_memory_bytes")]
+
+    current_path = str(tmpdir.join("current.json"))
+    benchmark.save_results(current, current_path)
+    assert main(["compare", path, path]) == 0
+    assert main(["compare", path, current_path]) == 1
+
+    current["instance_set_version"] = "0"
+    with pytest.raises(ValueError):
+        benchmark.compare_results(results, current)
+
+
+def test_benchmark_cli_run(tmpdir, capsys):
+    path = str(tmpdir.join("results.json"))
+    assert main(["run", "--families", "near-square", "--sizes", "5", "--minutes", "0.001", "-o", path]) == 0
+    assert list(benchmark.load_results(path)["results"]) == ["near-square-5"]
+    assert "near-square-5" in capsys.readouterr().err
@@ -51,3 +51,19 @@ def test_floorplan_str(example_floorplan):  # noqa: F811
         "{'id': 2, 'x': 5.0, 'y': 0.0}, {'id': 3, 'x': 0, 'y': 0}], "
         "'bounding_box': (8, 7.2), 'area': 57.6})" in floorplan.__str__()
     )
+
+
+def test_floorplan_lazy_positions(example_floorplan):  # noqa: F811
+    n_calls = 0
+
+    def positions():  # type: ignore
+        nonlocal n_calls
+        n_calls += 1
+        return example_floorplan["positions"]
+
+    floorplan = rps.Floorplan(positions=positions, bounding_box=example_floorplan["bounding_box"])
+    assert n_calls == 0
+
+    assert floorplan.positions == example_floorplan["positions"]
+    assert floorplan.positions == example_floorplan["positions"]
+    assert n_calls == 1
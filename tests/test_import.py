@@ -0,0 +1,45 @@
+# Copyright 2022 Kotaro Terada
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import subprocess
+import sys
+
+import pytest
+
+import rectangle_packing_solver as rps
+from rectangle_packing_solver.solution_cache import SolutionCache
+from rectangle_packing_solver.solver import Solver
+from rectangle_packing_solver.visualizer import Visualizer
+
+
+def test_import_without_slow_dependencies():
+    code = (
+        "import sys; import rectangle_packing_solver; "
+        + "print(' '.join([m for m in ['matplotlib', 'numpy', 'simanneal', 'sqlite3', 'tqdm'] if m in sys.modules]))"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.run([sys.executable, "-c", code], cwd=root, check=True, capture_output=True, text=True)
+    assert process.stdout.strip() == ""
+
+
+def test_import_lazy_classes():
+    assert rps.Solver is Solver
+    assert rps.Visualizer is Visualizer
+    assert rps.SolutionCache is SolutionCache
+    assert "Solver" in dir(rps)
+    assert "Visualizer" in dir(rps)
+    assert "SolutionCache" in dir(rps)
+
+    with pytest.raises(AttributeError):
+        rps.Unknown
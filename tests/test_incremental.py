@@ -0,0 +1,134 @@
+# Copyright 2022 Kotaro Terada
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import pytest
+
+import rectangle_packing_solver as rps
+from rectangle_packing_solver.incremental import IncrementalDecoder
+from tests.example_data import example_pair, example_problem  # noqa: F401
+
+
+def test_incremental_decoder_reset(example_problem, example_pair):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    decoder = IncrementalDecoder(problem=problem)
+    bounding_box = decoder.reset(gp=example_pair[0], gn=example_pair[1], rotations=[0, 0, 0, 1])
+    assert bounding_box == (8, 7.2)
+
+
+def test_incremental_decoder_commit_without_decode(example_problem):  # noqa: F811
+    decoder = IncrementalDecoder(problem=rps.Problem(rectangles=example_problem))
+    with pytest.raises(ValueError):
+        decoder.commit()
+
+
+@pytest.mark.parametrize("n", [2, 5, 20, 50])
+def test_incremental_decoder_random_moves(n):
+    random.seed(n)
+    problem = rps.Problem(rectangles=[(random.randint(1, 9), random.randint(1, 9), True) for _ in range(n)])
+    gp = random.sample(range(n), k=n)
+    gn = random.sample(range(n), k=n)
+    rotations = [0] * n
+    decoder = IncrementalDecoder(problem=problem)
+    decoder.reset(gp=gp, gn=gn, rotations=rotations)
+
+    for _ in range(100):
+        new_gp, new_gn, new_rotations = gp[:], gn[:], rotations[:]
+        move = {"gp_range": None, "gn_range": None, "rotated": []}
+        kind = random.choice(["gp", "gn", "both", "rotation"])
+        if kind in ["gp", "both"]:
+            i, j = sorted(random.sample(range(n), k=2))
+            new_gp[i], new_gp[j] = new_gp[j], new_gp[i]
+            move["gp_range"] = (i, j)
+        if kind in ["gn", "both"]:
+            i, j = sorted(random.sample(range(n), k=2))
+            new_gn[i], new_gn[j] = new_gn[j], new_gn[i]
+            move["gn_range"] = (i, j)
+        if kind == "rotation" or random.randint(0, 1) == 1:
+            i = random.randrange(n)
+            new_rotations[i] += 1
+            move["rotated"] = [i]
+
+        bounding_box = decoder.evaluate(gp=new_gp, gn=new_gn, rotations=new_rotations, **move)
+        floorplan = rps.SequencePair(pair=(new_gp, new_gn)).decode(problem=problem, rotations=new_rotations)
+        assert bounding_box == floorplan.bounding_box
+
+        # Accept a half of moves
+        if random.randint(0, 1) == 1:
+            decoder.commit()
+            gp, gn, rotations = new_gp, new_gn, new_rotations
+
+
+@pytest.mark.parametrize("n", [1, 5, 20])
+def test_incremental_decoder_longest_paths_through(n):
+    random.seed(n)
+    rectangles = [(random.randint(1, 9), random.randint(1, 9)) for _ in range(n)]
+    gp = random.sample(range(n), k=n)
+    gn = random.sample(range(n), k=n)
+    decoder = IncrementalDecoder(problem=rps.Problem(rectangles=rectangles))
+    with pytest.raises(ValueError):
+        decoder.longest_paths_through()
+    decoder.reset(gp=gp, gn=gn, rotations=[0] * n)
+    through_h, through_v = decoder.longest_paths_through()
+
+    # Enlarging a rectangle enough, the longest path goes through it
+    large = 1000
+    for i in range(n):
+        enlarged = rectangles[:]
+        enlarged[i] = (rectangles[i][0] + large, rectangles[i][1] + large)
+        bounding_box = IncrementalDecoder(problem=rps.Problem(rectangles=enlarged)).reset(
+            gp=gp, gn=gn, rotations=[0] * n
+        )
+        assert bounding_box == (through_h[i] + large, through_v[i] + large)
+
+
+@pytest.mark.parametrize("n", [5, 20, 50])
+def test_incremental_decoder_limits(n):
+    random.seed(n)
+    problem = rps.Problem(rectangles=[(random.randint(1, 9), random.randint(1, 9), True) for _ in range(n)])
+    gp = list(range(n))
+    gn = list(range(n))
+    rotations = [0] * n
+    decoder = IncrementalDecoder(problem=problem)
+    width, height = decoder.reset(gp=gp, gn=gn, rotations=rotations)
+    width_limit, height_limit = width * 1.2, height * 1.2
+
+    aborted = 0
+    for _ in range(100):
+        new_gp, new_gn = gp[:], gn[:]
+        i, j = sorted(random.sample(range(n), k=2))
+        if random.randint(0, 1) == 1:
+            new_gp[i], new_gp[j] = new_gp[j], new_gp[i]
+            move = {"gp_range": (i, j)}
+        else:
+            new_gn[i], new_gn[j] = new_gn[j], new_gn[i]
+            move = {"gn_range": (i, j)}
+
+        bounding_box = decoder.evaluate(
+            gp=new_gp, gn=new_gn, rotations=rotations, width_limit=width_limit, height_limit=height_limit, **move
+        )
+        expected = rps.SequencePair(pair=(new_gp, new_gn)).decode(problem=problem, rotations=rotations).bounding_box
+        if (width_limit < expected[0]) or (height_limit < expected[1]):
+            # The decoding may be aborted, and then the candidate cannot be committed
+            assert (width_limit < bounding_box[0]) or (height_limit < bounding_box[1])
+            if bounding_box != expected:
+                aborted += 1
+                with pytest.raises(ValueError):
+                    decoder.commit()
+        else:
+            assert bounding_box == expected
+            decoder.commit()
+            gp, gn = new_gp, new_gn
+    assert 0 < aborted
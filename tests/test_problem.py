@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import pickle
+
+import numpy as np
 import pytest
 
 import rectangle_packing_solver as rps
@@ -67,3 +70,61 @@ def test_problem_str(example_problem):  # noqa: F811
         "{'id': 2, 'width': 2.1, 'height': 3.2, 'rotatable': False}, "
         "{'id': 3, 'width': 1, 'height': 5, 'rotatable': True}]})" in problem.__str__()
     )
+
+
+def test_problem_arrays(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+
+    assert list(problem.widths) == [4, 4, 2.1, 1]
+    assert list(problem.heights) == [6, 4, 3.2, 5]
+    assert list(problem.rotatable) == [0, 0, 0, 1]
+    assert not hasattr(problem, "__dict__")
+
+
+def test_problem_from_arrays(example_problem):  # noqa: F811
+    problem = rps.Problem.from_arrays(
+        widths=[4, 4, 2.1, 1], heights=np.array([6, 4, 3.2, 5]), rotatable=[False, False, False, True]
+    )
+
+    assert problem.n == 4
+    assert problem.rectangles == rps.Problem(rectangles=example_problem).rectangles
+    assert [r["width"] for r in problem.rectangles] == [4, 4, 2.1, 1]
+    assert all([isinstance(r["height"], float) for r in problem.rectangles])  # NumPy arrays of floats
+
+
+def test_problem_from_arrays_integers():
+    problem = rps.Problem.from_arrays(widths=np.arange(1, 4), heights=[3, 2, 1])
+
+    assert problem.widths.typecode == "q"
+    assert problem.rectangles[2] == {"id": 2, "width": 3, "height": 1, "rotatable": False}
+
+
+def test_problem_number_types():
+    # Integers and floats are kept as they are given, even if they are mixed in an array of floats
+    problem = rps.Problem(rectangles=[(3.0, 2), (1, 2.5), {"width": 2, "height": 4.0}])
+    assert problem.widths.typecode == "d"
+    for p in [problem, pickle.loads(pickle.dumps(problem))]:
+        widths = [r["width"] for r in p.rectangles]
+        heights = [r["height"] for r in p.rectangles]
+        assert [type(w) for w in widths] == [float, int, int]
+        assert [type(h) for h in heights] == [int, float, float]
+
+    floorplan = rps.SequencePair(pair=([0, 1, 2], [0, 1, 2])).decode(problem=problem)
+    assert [type(p["width"]) for p in floorplan.positions] == [float, int, int]
+    assert [type(p["height"]) for p in floorplan.positions] == [int, float, float]
+
+
+def test_problem_from_arrays_invalid():
+    with pytest.raises(ValueError):
+        rps.Problem.from_arrays(widths=[1, 2, 3], heights=[1, 2])
+
+    with pytest.raises(TypeError):
+        rps.Problem.from_arrays(widths=["a", "b"], heights=[1, 2])
+
+
+def test_problem_pickle(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    unpickled = pickle.loads(pickle.dumps(problem))
+
+    assert unpickled.n == problem.n
+    assert unpickled.rectangles == problem.rectangles
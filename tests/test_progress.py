@@ -0,0 +1,71 @@
+# Copyright 2022 Kotaro Terada
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+
+import pytest
+
+import rectangle_packing_solver as rps
+
+
+def test_throttled_progress_every_steps():
+    reports = []
+    progress = rps.ThrottledProgress(lambda *args: reports.append(args), every_steps=10)
+    for step in range(101):
+        progress(step, 100, 1.0, 2.0, 3.0)
+
+    # The first and last steps are always forwarded
+    assert [r[0] for r in reports] == list(range(0, 101, 10))
+    assert reports[-1] == (100, 100, 1.0, 2.0, 3.0)
+
+
+def test_throttled_progress_every_seconds():
+    reports = []
+    progress = rps.ThrottledProgress(lambda *args: reports.append(args), every_seconds=0.05)
+    for step in range(10):
+        progress(step, 100, 1.0, 2.0, 3.0)
+    assert [r[0] for r in reports] == [0]
+
+    time.sleep(0.06)
+    progress(10, 100, 1.0, 2.0, 3.0)
+    assert [r[0] for r in reports] == [0, 10]
+
+    # Either of the conditions
+    reports.clear()
+    progress = rps.ThrottledProgress(lambda *args: reports.append(args), every_steps=5, every_seconds=3600.0)
+    for step in range(11):
+        progress(step, 100, 1.0, 2.0, 3.0)
+    assert [r[0] for r in reports] == [0, 5, 10]
+
+
+def test_throttled_progress_invalid():
+    with pytest.raises(ValueError):
+        rps.ThrottledProgress(print, every_steps=0)
+    with pytest.raises(ValueError):
+        rps.ThrottledProgress(print, every_seconds=-1.0)
+
+
+def test_tqdm_progress(capfd):
+    progress = rps.TqdmProgress(desc="Test")
+    for step in range(11):
+        progress(step, 10, 1.0, 2.0, 3.0)
+
+    out, err = capfd.readouterr()
+    assert out == ""
+    assert "Test: 100%" in err
+
+    # Another bar is shown for the next run
+    progress(0, 5, 1.0, 2.0, 3.0)
+    progress.close()
+    out, err = capfd.readouterr()
+    assert "Test:   0%" in err
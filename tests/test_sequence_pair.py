@@ -13,9 +13,18 @@
 # limitations under the License.
 
 import math
+import random
+
+import numpy as np
+import pytest
 
 import rectangle_packing_solver as rps
-from tests.example_data import example_pair_horizontally, example_pair_vertically, example_problem  # noqa: F401
+from tests.example_data import (  # noqa: F401
+    example_pair,
+    example_pair_horizontally,
+    example_pair_vertically,
+    example_problem,
+)
 
 
 def test_sequence_pair_init_horizontally(example_pair_horizontally):  # noqa: F811
@@ -42,6 +51,13 @@ def test_sequence_pair_init_vertically(example_pair_vertically):  # noqa: F811
     assert seqpair.oblique_grid.coordinates == [{"a": 0, "b": 3}, {"a": 1, "b": 2}, {"a": 2, "b": 1}, {"a": 3, "b": 0}]
 
 
+def test_sequence_pair_init_invalid():
+    for pair in [([0, 0, 1], [1, 2, 2]), ([0, 1, 2], [0, 1, 1]), ([1, 2, 3], [3, 2, 1]), ([0, 1, 2], [0, 1, 3])]:
+        with pytest.raises(ValueError) as e:
+            rps.SequencePair(pair=pair)
+        assert "Lists in the pair must be permutations of the same IDs (from 0 to n-1)." in str(e.value)
+
+
 def test_sequence_pair_decode_horizontally(example_problem, example_pair_horizontally):  # noqa: F811
     seqpair = rps.SequencePair(pair=example_pair_horizontally)
     floorplan = seqpair.decode(problem=rps.Problem(rectangles=example_problem))
@@ -136,3 +152,104 @@ def test_sequence_pair_operators(example_pair_horizontally, example_pair_vertica
     assert id(seqpair_1) != id(seqpair_2) != id(seqpair_3)
     assert seqpair_1 == seqpair_2
     assert seqpair_1 != seqpair_3
+
+
+def test_sequence_pair_decode_graph(example_problem, example_pair_horizontally, example_pair_vertically):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    for pair in [example_pair_horizontally, example_pair_vertically, ([0, 1, 3, 2], [3, 0, 2, 1])]:
+        seqpair = rps.SequencePair(pair=pair)
+        floorplan_lcs = seqpair.decode(problem=problem, rotations=[0, 0, 0, 1], decoder="lcs")
+        floorplan_graph = seqpair.decode(problem=problem, rotations=[0, 0, 0, 1], decoder="graph")
+
+        assert floorplan_lcs.positions == floorplan_graph.positions
+        assert floorplan_lcs.bounding_box == floorplan_graph.bounding_box
+        assert floorplan_lcs.area == floorplan_graph.area
+
+
+def test_sequence_pair_decode_random():
+    random.seed(1234)
+    for n in [1, 2, 5, 10, 30]:
+        problem = rps.Problem(rectangles=[(random.uniform(1, 10), random.uniform(1, 10), True) for _ in range(n)])
+        gp = random.sample(range(n), k=n)
+        gn = random.sample(range(n), k=n)
+        rotations = [random.randint(0, 1) for _ in range(n)]
+        seqpair = rps.SequencePair(pair=(gp, gn))
+        floorplan_lcs = seqpair.decode(problem=problem, rotations=rotations, decoder="lcs")
+        floorplan_graph = seqpair.decode(problem=problem, rotations=rotations, decoder="graph")
+
+        assert floorplan_lcs.positions == floorplan_graph.positions
+        assert floorplan_lcs.bounding_box == floorplan_graph.bounding_box
+
+
+def test_sequence_pair_decode_invalid_decoder(example_problem, example_pair):  # noqa: F811
+    seqpair = rps.SequencePair(pair=example_pair)
+    with pytest.raises(ValueError) as e:
+        seqpair.decode(problem=rps.Problem(rectangles=example_problem), decoder="invalid")
+    assert "'decoder' must be either of ['lcs', 'graph']." in str(e.value)
+
+
+def test_sequence_pair_decode_batch():
+    random.seed(2345)
+    n, batch = 12, 20
+    problem = rps.Problem(rectangles=[(random.uniform(1, 10), random.uniform(1, 10), True) for _ in range(n)])
+    gp_matrix = np.array([random.sample(range(n), k=n) for _ in range(batch)])
+    gn_matrix = np.array([random.sample(range(n), k=n) for _ in range(batch)])
+    rot_matrix = np.array([[random.randint(0, 1) for _ in range(n)] for _ in range(batch)])
+    result = rps.SequencePair.decode_batch(problem, gp_matrix, gn_matrix, rot_matrix, positions=True)
+
+    assert result["width"].shape == (batch,)
+    assert result["height"].shape == (batch,)
+    assert result["area"].shape == (batch,)
+    assert result["positions"]["x"].shape == (batch, n)
+
+    for b in range(batch):
+        seqpair = rps.SequencePair(pair=(list(gp_matrix[b]), list(gn_matrix[b])))
+        floorplan = seqpair.decode(problem=problem, rotations=list(rot_matrix[b]))
+        assert math.isclose(result["width"][b], floorplan.bounding_box[0])
+        assert math.isclose(result["height"][b], floorplan.bounding_box[1])
+        assert math.isclose(result["area"][b], floorplan.area)
+        for position in floorplan.positions:
+            assert math.isclose(result["positions"]["x"][b, position["id"]], position["x"], abs_tol=1e-9)
+            assert math.isclose(result["positions"]["y"][b, position["id"]], position["y"], abs_tol=1e-9)
+            assert math.isclose(result["positions"]["width"][b, position["id"]], position["width"])
+            assert math.isclose(result["positions"]["height"][b, position["id"]], position["height"])
+
+
+def test_sequence_pair_decode_batch_invalid(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    with pytest.raises(ValueError):
+        rps.SequencePair.decode_batch(problem, [[0, 1, 2, 3]], [[0, 1, 2]])
+    with pytest.raises(ValueError):
+        rps.SequencePair.decode_batch(problem, [[0, 1, 2]], [[0, 1, 2]])
+    with pytest.raises(ValueError) as e:
+        rps.SequencePair.decode_batch(problem, [[0, 1, 2, 3]], [[0, 1, 2, 3]], [[1, 0, 0, 0]])
+    assert "not rotatable" in str(e.value)
+
+
+def test_sequence_pair_decode_mixed_numbers():
+    # Integers mixed with floats are kept as integers in the floorplan
+    problem = rps.Problem(rectangles=[(1, 2), (2.5, 3)])
+    floorplan = rps.SequencePair(pair=([0, 1], [0, 1])).decode(problem=problem)
+    assert floorplan.positions[0] == {"id": 0, "x": 0, "y": 0, "width": 1, "height": 2}
+    assert all([isinstance(floorplan.positions[0][key], int) for key in ["x", "y", "width", "height"]])
+    assert floorplan.positions[1] == {"id": 1, "x": 1, "y": 0, "width": 2.5, "height": 3}
+    assert floorplan.bounding_box == (3.5, 3)
+
+
+def test_sequence_pair_bounding_box(example_problem, example_pair):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    seqpair = rps.SequencePair(pair=example_pair)
+
+    for decoder in ["lcs", "graph"]:
+        bounding_box = seqpair.bounding_box(problem=problem, rotations=[0, 0, 0, 1], decoder=decoder)
+        assert bounding_box == (8, 7.2)
+        assert bounding_box == seqpair.decode(problem=problem, rotations=[0, 0, 0, 1], decoder=decoder).bounding_box
+
+
+def test_sequence_pair_decode_lazy_positions(example_problem, example_pair):  # noqa: F811
+    seqpair = rps.SequencePair(pair=example_pair)
+    floorplan = seqpair.decode(problem=rps.Problem(rectangles=example_problem), rotations=[0, 0, 0, 1])
+
+    assert callable(floorplan._positions)
+    assert floorplan.positions[3] == {"id": 3, "x": 0, "y": 0, "width": 5, "height": 1}
+    assert isinstance(floorplan._positions, list)
@@ -0,0 +1,128 @@
+# Copyright 2022 Kotaro Terada
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import rectangle_packing_solver as rps
+from tests.example_data import example_problem  # noqa: F401
+
+
+def put_solution(path: str) -> bool:
+    problem = rps.Problem(rectangles=[(2, 3), (4, 1, True), (1, 1)])
+    seqpair = rps.SequencePair(pair=([0, 1, 2], [0, 1, 2]))
+    solution = rps.Solution(sequence_pair=seqpair, floorplan=seqpair.decode(problem=problem))
+    return rps.SolutionCache(path=path).put(problem, solution)
+
+
+def test_solution_cache_put_and_get(example_problem, tmp_path):  # noqa: F811
+    cache = rps.SolutionCache(path=str(tmp_path / "cache.db"))
+    problem = rps.Problem(rectangles=example_problem)
+    seqpair = rps.SequencePair(pair=([0, 1, 2, 3], [3, 2, 1, 0]))
+    solution = rps.Solution(sequence_pair=seqpair, floorplan=seqpair.decode(problem=problem, rotations=[0, 0, 0, 1]))
+
+    assert cache.get(problem) is None
+    assert cache.put(problem, solution)
+    assert len(cache) == 1
+    cached = cache.get(problem)
+    assert cached.sequence_pair == seqpair
+    assert cached.rotations == [0, 0, 0, 1]
+    assert cached.floorplan.positions == solution.floorplan.positions
+
+    # The same rectangles in a different order (and a rotatable one flipped) hit the same entry
+    problem_shuffled = rps.Problem(rectangles=[(5, 1, True), {"width": 2.1, "height": 3.2}, (4, 4), (4, 6)])
+    assert cache.fingerprint(problem_shuffled) == cache.fingerprint(problem)
+    cached = cache.get(problem_shuffled)
+    assert cached.floorplan.bounding_box == solution.floorplan.bounding_box
+    assert sorted([(p["width"], p["height"]) for p in cached.floorplan.positions]) == sorted(
+        [(p["width"], p["height"]) for p in solution.floorplan.positions]
+    )
+
+    # Limits are a part of the key
+    assert cache.fingerprint(problem, width_limit=10) != cache.fingerprint(problem)
+    assert cache.get(problem, width_limit=10) is None
+
+
+def test_solution_cache_keeps_best(example_problem, tmp_path):  # noqa: F811
+    cache = rps.SolutionCache(path=str(tmp_path / "cache.db"))
+    problem = rps.Problem(rectangles=example_problem)
+    seqpair_good = rps.SequencePair(pair=([0, 1, 2, 3], [0, 1, 2, 3]))
+    good = rps.Solution(sequence_pair=seqpair_good, floorplan=seqpair_good.decode(problem=problem))
+    seqpair_bad = rps.SequencePair(pair=([0, 1, 2, 3], [3, 2, 1, 0]))
+    bad = rps.Solution(sequence_pair=seqpair_bad, floorplan=seqpair_bad.decode(problem=problem))
+    assert good.floorplan.area < bad.floorplan.area
+
+    assert cache.put(problem, bad)
+    assert cache.put(problem, good)
+    assert not cache.put(problem, bad)
+    assert cache.get(problem).floorplan.area == good.floorplan.area
+
+    # A solution satisfying the limits is better
+    assert cache.put(problem, good, width_limit=6)
+    assert cache.put(problem, bad, width_limit=6)
+    assert cache.get(problem, width_limit=6).floorplan.area == bad.floorplan.area
+
+
+def test_solution_cache_eviction(example_problem, tmp_path):  # noqa: F811
+    cache = rps.SolutionCache(path=str(tmp_path / "cache.db"), max_entries=2)
+    problem = rps.Problem(rectangles=example_problem)
+    seqpair = rps.SequencePair(pair=([0, 1, 2, 3], [0, 1, 2, 3]))
+    solution = rps.Solution(sequence_pair=seqpair, floorplan=seqpair.decode(problem=problem))
+
+    cache.put(problem, solution, width_limit=100)
+    cache.put(problem, solution, width_limit=200)
+    cache.get(problem, width_limit=100)
+    cache.put(problem, solution, width_limit=300)
+
+    # The least recently used entry is evicted
+    assert len(cache) == 2
+    assert cache.get(problem, width_limit=100) is not None
+    assert cache.get(problem, width_limit=200) is None
+
+    cache.clear()
+    assert len(cache) == 0
+
+    with pytest.raises(ValueError):
+        rps.SolutionCache(path=str(tmp_path / "cache.db"), max_entries=0)
+
+
+def test_solution_cache_processes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        stored = list(executor.map(put_solution, [path] * 8))
+    assert 1 <= sum(stored)
+    assert len(rps.SolutionCache(path=path)) == 1
+
+
+def test_solver_with_solution_cache(example_problem, tmp_path):  # noqa: F811
+    cache = rps.SolutionCache(path=str(tmp_path / "cache.db"))
+    problem = rps.Problem(rectangles=example_problem)
+    solver = rps.Solver()
+
+    solution = solver.solve(
+        problem=problem, simanneal_minutes=0.01, simanneal_steps=50, solution_cache=cache, stats=True
+    )
+    assert not solution.stats["cache_hit"]
+    assert len(cache) == 1
+
+    # The stored solution is returned immediately
+    cached = solver.solve(problem=problem, solution_cache=cache, stats=True)
+    assert cached.stats["cache_hit"]
+    assert cached.floorplan.area == solution.floorplan.area
+
+    # Warm start: the refined solution is not worse than the stored one
+    refined = solver.solve(problem=problem, simanneal_minutes=0.005, solution_cache=cache, warm_start=True, stats=True)
+    assert refined.stats["cache_hit"]
+    assert refined.floorplan.area <= solution.floorplan.area
@@ -12,9 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import random
+import threading
+import time
+
 import pytest
+import simanneal
 
 import rectangle_packing_solver as rps
+from rectangle_packing_solver.solver import (
+    RectanglePackingProblemAnnealer,
+    RectanglePackingProblemAnnealerHard,
+    RectanglePackingProblemAnnealerSoft,
+)
 from tests.example_data import example_large_problem, example_problem  # noqa: F401
 
 ################################################################
@@ -71,6 +81,35 @@ def test_solver_progress_bar(example_problem, capfd):  # noqa: F811
     assert "Progress: 100%" in err
 
 
+def test_solver_progress_callback(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    reports = []
+
+    def progress_callback(step, total, temperature, energy, best_energy):  # type: ignore
+        reports.append((step, total, temperature, energy, best_energy))
+
+    solution = rps.Solver().solve(
+        problem=problem, simanneal_minutes=0.01, progress_callback=progress_callback, stats=True
+    )
+    steps = solution.stats["chains"][0]["schedule"]["steps"]
+    assert [r[0] for r in reports] == list(range(steps + 1))
+    assert all([total == steps for _, total, _, _, _ in reports])
+    assert all([best_energy <= energy for _, _, _, energy, best_energy in reports])
+    assert [r[4] for r in reports] == sorted([r[4] for r in reports], reverse=True)
+    assert reports[-1][2] == pytest.approx(solution.stats["chains"][0]["schedule"]["tmin"])
+
+    # Throttled reports
+    reports.clear()
+    progress = rps.ThrottledProgress(progress_callback, every_steps=100)
+    solution = rps.Solver().solve(problem=problem, simanneal_minutes=0.01, progress_callback=progress, stats=True)
+    steps = solution.stats["chains"][0]["schedule"]["steps"]
+    assert len(reports) == (steps - 1) // 100 + 2
+    assert reports[-1][0] == steps
+
+    with pytest.raises(ValueError):
+        rps.Solver().solve(problem=problem, n_workers=2, n_restarts=2, progress_callback=progress_callback)
+
+
 ################################################################
 # Large example
 ################################################################
@@ -147,6 +186,638 @@ def test_solver_with_tight_limits(width_limit, height_limit):
     assert solution.floorplan.bounding_box[1] <= height_limit
 
 
+################################################################
+# Multi-start
+################################################################
+
+
+def test_solver_multi_start(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solver = rps.Solver()
+    solution = solver.solve(
+        problem=problem, simanneal_minutes=0.01, simanneal_steps=50, seed=1234, n_workers=2, n_restarts=3, stats=True
+    )
+
+    assert isinstance(solution, rps.Solution)
+    assert len(solution.stats["chains"]) == 3
+    assert solution.floorplan.area == min(c["area"] for c in solution.stats["chains"])
+    assert solution.floorplan.area == solution.stats["chains"][solution.stats["best_chain"]]["area"]
+
+    # Derived seeds do not depend on the number of workers
+    solution_single = solver.solve(
+        problem=problem, simanneal_minutes=0.01, simanneal_steps=50, seed=1234, n_workers=1, n_restarts=3, stats=True
+    )
+    assert [c["seed"] for c in solution.stats["chains"]] == [c["seed"] for c in solution_single.stats["chains"]]
+
+
+def test_solver_multi_start_reproducible(example_large_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_large_problem)
+    rps.Solver.clear_schedule_cache()
+
+    # The steps are limited by max_evaluations (not by the time), and the chains are the same for any n_workers,
+    # even though the schedule is estimated by the first chain and cached for the others in a single worker
+    results = []
+    for n_workers in [1, 2]:
+        solution = rps.Solver().solve(
+            problem=problem,
+            simanneal_minutes=0.1,
+            seed=7,
+            n_workers=n_workers,
+            n_restarts=3,
+            max_evaluations=2000,
+            stats=True,
+        )
+        chains = solution.stats["chains"]
+        results.append([(c["seed"], c["bounding_box"], c["area"]) for c in chains] + [solution.stats["best_chain"]])
+    assert results[0] == results[1]
+
+
+def test_solver_multi_start_with_limits(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solution = rps.Solver().solve(
+        problem=problem, width_limit=6.5, simanneal_minutes=0.01, simanneal_steps=50, n_workers=2, n_restarts=2
+    )
+    assert solution.floorplan.bounding_box[0] <= 6.5
+    assert solution.stats is None
+
+
+def test_solver_multi_start_invalid(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    with pytest.raises(ValueError):
+        rps.Solver().solve(problem=problem, n_workers=0)
+    with pytest.raises(ValueError):
+        rps.Solver().solve(problem=problem, n_restarts=0)
+
+
+def test_solver_deadline(example_large_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_large_problem)
+    improvements = []
+
+    def on_improvement(solution, elapsed):  # type: ignore
+        improvements.append((solution.floorplan.area, elapsed))
+
+    start = time.time()
+    solution = rps.Solver().solve(problem=problem, simanneal_minutes=1.0, deadline=0.2, on_improvement=on_improvement)
+    assert time.time() - start < 0.2 + 0.1
+
+    # The best solution so far is returned
+    assert 0 < len(improvements)
+    assert [area for area, _ in improvements] == sorted([area for area, _ in improvements], reverse=True)
+    assert [elapsed for _, elapsed in improvements] == sorted([elapsed for _, elapsed in improvements])
+    assert solution.floorplan.area == improvements[-1][0]
+
+
+def test_solver_max_evaluations_and_cancel(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solution = rps.Solver().solve(problem=problem, max_evaluations=10, stats=True)
+    assert solution.interrupted
+    assert solution.stats["chains"][0]["interrupted"]
+
+    # Enough evaluations
+    solution = rps.Solver().solve(problem=problem, simanneal_minutes=0.01, simanneal_steps=50, max_evaluations=10**6)
+    assert not solution.interrupted
+
+    cancel = threading.Event()
+    cancel.set()
+    solution = rps.Solver().solve(problem=problem, simanneal_minutes=1.0, cancel=cancel)
+    assert solution.interrupted
+    assert isinstance(solution, rps.Solution)
+
+
+def test_solver_cancel_in_thread(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    cancel = threading.Event()
+    results = []
+
+    def solve():  # type: ignore
+        results.append(rps.Solver().solve(problem=problem, simanneal_minutes=1.0, cancel=cancel))
+
+    thread = threading.Thread(target=solve)
+    start = time.time()
+    thread.start()
+    time.sleep(0.2)
+    cancel.set()
+    thread.join(timeout=10.0)
+
+    assert not thread.is_alive()
+    assert time.time() - start < 10.0
+    assert isinstance(results[0], rps.Solution)
+    assert results[0].interrupted
+
+
+def test_solver_budget_invalid(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    with pytest.raises(ValueError):
+        rps.Solver().solve(problem=problem, deadline=-1.0)
+    with pytest.raises(ValueError):
+        rps.Solver().solve(problem=problem, max_evaluations=0)
+    with pytest.raises(ValueError):
+        rps.Solver().solve(problem=problem, n_workers=2, n_restarts=2, cancel=threading.Event())
+
+
+def test_solver_initial_solution(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solver = rps.Solver()
+    solution = solver.solve(problem=problem, simanneal_minutes=0.01, simanneal_steps=50)
+
+    # Warm start from a solution
+    refined = solver.solve(problem=problem, simanneal_minutes=0.001, initial_solution=solution)
+    assert refined.floorplan.area <= solution.floorplan.area
+
+    # Warm start from a sequence-pair with rotations
+    seqpair = rps.SequencePair(pair=([0, 1, 2, 3], [0, 1, 2, 3]))
+    floorplan = seqpair.decode(problem=problem, rotations=[0, 0, 0, 1])
+    refined = solver.solve(
+        problem=problem,
+        width_limit=12,
+        simanneal_minutes=0.001,
+        initial_solution=seqpair,
+        initial_rotations=[0, 0, 0, 1],
+    )
+    assert refined.floorplan.area <= floorplan.area
+    assert refined.floorplan.bounding_box[0] <= 12
+
+
+def test_solver_initial_solution_invalid(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solver = rps.Solver()
+    with pytest.raises(TypeError):
+        solver.solve(problem=problem, initial_solution=[0, 1, 2, 3])
+    with pytest.raises(ValueError):
+        solver.solve(problem=problem, initial_solution=rps.SequencePair(pair=([0, 1, 2], [0, 1, 2])))
+    with pytest.raises(ValueError):
+        solver.solve(
+            problem=problem,
+            initial_solution=rps.SequencePair(pair=([0, 1, 2, 3], [0, 1, 2, 3])),
+            initial_rotations=[0],
+        )
+    with pytest.raises(ValueError):
+        solver.solve(
+            problem=problem,
+            initial_solution=rps.SequencePair(pair=([0, 1, 2, 3], [0, 1, 2, 3])),
+            initial_rotations=[0, 0, 1, 0],
+        )
+
+
+def test_solver_update(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solver = rps.Solver()
+    solution = solver.solve(problem=problem, simanneal_minutes=0.01, simanneal_steps=50)
+
+    new_problem, new_solution = solver.update(
+        solution, problem, added=[(3, 2), {"width": 1, "height": 4, "rotatable": True}], removed=[1], seed=1
+    )
+    assert new_problem.n == 5
+    assert new_problem.rectangles[:3] == [
+        {"id": 0, "width": 4, "height": 6, "rotatable": False},
+        {"id": 1, "width": 2.1, "height": 3.2, "rotatable": False},
+        {"id": 2, "width": 1, "height": 5, "rotatable": True},
+    ]
+    assert new_problem.rectangles[3:] == [
+        {"id": 3, "width": 3, "height": 2, "rotatable": False},
+        {"id": 4, "width": 1, "height": 4, "rotatable": True},
+    ]
+    assert sorted(new_solution.sequence_pair.gp) == list(range(5))
+    assert sorted([p["id"] for p in new_solution.floorplan.positions]) == list(range(5))
+
+    # With a width limit
+    new_problem, new_solution = solver.update(solution, problem, added=[(3, 2)], width_limit=8)
+    assert new_problem.n == 5
+    assert new_solution.floorplan.bounding_box[0] <= 8
+
+
+def test_solver_update_invalid(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solver = rps.Solver()
+    solution = solver.solve(problem=problem, simanneal_minutes=0.01, simanneal_steps=50)
+    with pytest.raises(ValueError):
+        solver.update(solution, problem, removed=[4])
+    with pytest.raises(ValueError):
+        solver.update(solution, problem, removed=[1, 1])
+    with pytest.raises(ValueError):
+        solver.update(solution, problem, removed=[0, 1, 2])
+    with pytest.raises(TypeError):
+        solver.update(solution, problem, added=[1])
+    with pytest.raises(TypeError):
+        solver.update(problem, solution)
+
+
+def test_solver_solve_many(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solver = rps.Solver()
+
+    # Serial
+    results = list(solver.solve_many([problem, problem], simanneal_minutes=0.01, simanneal_steps=50))
+    assert [index for index, _ in results] == [0, 1]
+    assert all([isinstance(solution, rps.Solution) for _, solution in results])
+
+    # Parallel, with options for each problem
+    problems = [problem, (problem, {"width_limit": 6.5}), problem, problem]
+    results = list(solver.solve_many(problems, n_workers=2, simanneal_minutes=0.01, simanneal_steps=50, seed=1))
+    assert sorted([index for index, _ in results]) == [0, 1, 2, 3]
+    assert dict(results)[1].floorplan.bounding_box[0] <= 6.5
+
+
+def test_solver_solve_many_backpressure(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    n_taken = 0
+
+    def problems():  # type: ignore
+        nonlocal n_taken
+        while True:
+            n_taken += 1
+            yield problem
+
+    results = rps.Solver().solve_many(
+        problems(), n_workers=2, max_pending=3, simanneal_minutes=0.01, simanneal_steps=50
+    )
+    for n_results, (index, solution) in enumerate(results, start=1):
+        assert isinstance(solution, rps.Solution)
+        assert n_taken <= n_results + 3
+        if n_results == 5:
+            break
+    results.close()
+
+
+def test_solver_solve_many_invalid(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    with pytest.raises(ValueError):
+        list(rps.Solver().solve_many([problem], n_workers=0))
+    with pytest.raises(ValueError):
+        list(rps.Solver().solve_many([problem], max_pending=0))
+    with pytest.raises(ValueError):
+        list(rps.Solver().solve_many([problem], width_limit=1.0))
+
+
+def test_solver_parallel_tempering(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solver = rps.Solver()
+    solution = solver.solve_parallel_tempering(
+        problem=problem, n_replicas=3, exchange_steps=20, n_rounds=4, seed=1234, n_workers=2, stats=True
+    )
+
+    assert isinstance(solution, rps.Solution)
+    assert solution.floorplan.area == solution.stats["best_energy"]
+    assert solution.stats["rounds"] == 4
+    assert len(solution.stats["temperatures"]) == 3
+    assert solution.stats["temperatures"] == sorted(solution.stats["temperatures"])
+    assert solution.stats["swaps_attempted"] == [2, 2]
+    assert all([a <= b for a, b in zip(solution.stats["swaps_accepted"], solution.stats["swaps_attempted"])])
+
+    # The result does not depend on the number of workers, when the number of rounds is given
+    solution_single = solver.solve_parallel_tempering(
+        problem=problem, n_replicas=3, exchange_steps=20, n_rounds=4, seed=1234, n_workers=1, stats=True
+    )
+    assert solution.sequence_pair == solution_single.sequence_pair
+    assert solution.stats["swaps_accepted"] == solution_single.stats["swaps_accepted"]
+
+
+def test_solver_parallel_tempering_with_limits(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solution = rps.Solver().solve_parallel_tempering(
+        problem=problem, width_limit=6.5, temperatures=[10.0, 1.0], minutes=0.001, seed=1, stats=True
+    )
+    assert solution.floorplan.bounding_box[0] <= 6.5
+    assert solution.stats["temperatures"] == [1.0, 10.0]
+    assert 1 <= solution.stats["rounds"]
+
+
+def test_solver_parallel_tempering_invalid(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    with pytest.raises(ValueError):
+        rps.Solver().solve_parallel_tempering(problem=problem, n_replicas=0)
+    with pytest.raises(ValueError):
+        rps.Solver().solve_parallel_tempering(problem=problem, temperatures=[1.0, 0.0])
+    with pytest.raises(ValueError):
+        rps.Solver().solve_parallel_tempering(problem=problem, exchange_steps=0)
+    with pytest.raises(ValueError):
+        rps.Solver().solve_parallel_tempering(problem=problem, n_rounds=0)
+    with pytest.raises(ValueError):
+        rps.Solver().solve_parallel_tempering(problem=problem, width_limit=1.0)
+
+
+################################################################
+# Annealer
+################################################################
+
+
+@pytest.mark.parametrize("annealer", [RectanglePackingProblemAnnealerHard, RectanglePackingProblemAnnealerSoft])
+def test_annealer_decodes_once_per_step(annealer, example_large_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_large_problem)
+    init_state = list(range(problem.n)) + list(reversed(range(problem.n))) + [0] * problem.n
+    rpp = annealer(state=init_state, problem=problem, width_limit=300.0, height_limit=300.0)
+
+    n_evaluations = 0
+    evaluate = rpp._evaluate
+
+    def counting_evaluate(move=None):  # type: ignore
+        nonlocal n_evaluations
+        n_evaluations += 1
+        return evaluate(move=move)
+
+    rpp._evaluate = counting_evaluate
+    rpp.copy_strategy = "slice"
+    rpp.set_schedule({"tmax": 1000.0, "tmin": 1.0, "steps": 200, "updates": 0})
+    random.seed(1)
+    best_state, best_energy = rpp.anneal()
+
+    # One evaluation for the initial state, and one for each step
+    assert n_evaluations == 201
+    assert rpp.state == best_state
+    assert rpp.energy() == best_energy
+
+
+@pytest.mark.parametrize("annealer", [RectanglePackingProblemAnnealerHard, RectanglePackingProblemAnnealerSoft])
+def test_annealer_native_loop(annealer, example_large_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_large_problem)
+    init_state = list(range(problem.n)) + list(reversed(range(problem.n))) + [0] * problem.n
+
+    results = []
+    for anneal in [simanneal.Annealer.anneal, RectanglePackingProblemAnnealer.anneal]:
+        rpp = annealer(state=init_state[:], problem=problem, width_limit=300.0, height_limit=300.0)
+        rpp.copy_strategy = "slice"
+        rpp.set_schedule({"tmax": 1000.0, "tmin": 1.0, "steps": 500, "updates": 0})
+        random.seed(1)
+        results.append(anneal(rpp))
+        assert rpp.state == results[-1][0]
+        assert rpp.energy() == results[-1][1]
+
+    # The native loop follows the same moves and acceptances as simanneal
+    assert results[0] == results[1]
+
+    # A move applied in place is undone
+    state = rpp.state[:]
+    rpp._apply_move()
+    assert rpp.state != state
+    rpp._undo()
+    assert rpp.state == state
+
+
+def test_annealer_feasible_move(example_large_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_large_problem)
+    init_state = list(range(problem.n)) + list(reversed(range(problem.n))) + [0] * problem.n
+    rpp = RectanglePackingProblemAnnealerHard(state=init_state, problem=problem, width_limit=120.0)
+    rpp.copy_strategy = "slice"
+    rpp.energy()
+
+    # The moves never violate the limit
+    random.seed(1)
+    for _ in range(100):
+        state = rpp.state[:]
+        move = rpp._feasible_move()
+        assert move is not None
+        energy, bounding_box = rpp._evaluate(move=move)
+        assert bounding_box[0] <= 120.0
+        rpp._undo()
+        assert rpp.state == state
+
+    # The trials to find moves are counted
+    rpp.set_schedule({"tmax": 1000.0, "tmin": 1.0, "steps": 200, "updates": 0})
+    rpp.anneal()
+    trial_info = rpp.trial_info()
+    assert trial_info["moves"] == 200
+    assert trial_info["moves"] <= trial_info["trials"]
+    assert trial_info["max_trials"] == max(trial_info["histogram"])
+    assert sum(trial_info["histogram"].values()) == 200
+
+
+@pytest.mark.parametrize("moves", [["swap"], ["exchange"], ["shift"], ["rotate"], ["reverse"]])
+def test_annealer_moves(moves):
+    random.seed(1)
+    n = 20
+    problem = rps.Problem(rectangles=[(random.randint(1, 9), random.randint(1, 9), True) for _ in range(n)])
+    init_state = random.sample(range(n), k=n) + random.sample(range(n), k=n) + [0] * n
+    rpp = RectanglePackingProblemAnnealerSoft(state=init_state, problem=problem, moves=moves)
+    rpp.energy()
+
+    for _ in range(100):
+        # A move is decoded incrementally, and undone or committed
+        state = rpp.state[:]
+        energy, bounding_box = rpp._apply_move()
+        gp, gn, rotations = rpp.retrieve_pairs(n=n, state=rpp.state)
+        assert sorted(gp) == sorted(gn) == list(range(n))
+        floorplan = rps.SequencePair(pair=(gp, gn)).decode(problem=problem, rotations=rotations)
+        assert bounding_box == floorplan.bounding_box
+        if moves == ["swap"]:
+            # A swapped rectangle may be rotated
+            changed = [i for i in range(2 * n) if state[i] != rpp.state[i]]
+            rotated = [i for i in range(n) if state[2 * n + i] != rotations[i]]
+            assert all([r in [state[i] for i in changed] for r in rotated])
+        if random.randint(0, 1) == 1:
+            rpp._undo()
+            assert rpp.state == state
+        else:
+            rpp._commit()
+
+    move_info = rpp.move_info()
+    assert move_info[moves[0]]["selected"] == 100
+    assert move_info[moves[0]]["probability"] == 1.0
+
+
+def test_annealer_adaptive_moves(example_large_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_large_problem)
+    init_state = list(range(problem.n)) + list(reversed(range(problem.n))) + [0] * problem.n
+    rpp = RectanglePackingProblemAnnealerSoft(state=init_state, problem=problem)
+    rpp.set_schedule({"tmax": 1000.0, "tmin": 1.0, "steps": 1000, "updates": 0})
+    random.seed(1)
+    rpp.anneal()
+
+    # Rotation is not in the moves, since no rectangle can be rotated
+    move_info = rpp.move_info()
+    assert sorted(move_info) == sorted([m for m in rps.solver.MOVES if m != "rotate"])
+    assert sum([m["selected"] for m in move_info.values()]) == 1000
+    assert all([m["accepted"] <= m["selected"] for m in move_info.values()])
+    assert sum([m["probability"] for m in move_info.values()]) == pytest.approx(1.0)
+    assert all([0.05 <= m["probability"] for m in move_info.values()])
+
+    with pytest.raises(ValueError):
+        RectanglePackingProblemAnnealerSoft(state=init_state, problem=problem, moves=[])
+    with pytest.raises(ValueError):
+        RectanglePackingProblemAnnealerSoft(state=init_state, problem=problem, moves=["unknown"])
+
+
+@pytest.mark.parametrize("annealer", [RectanglePackingProblemAnnealerHard, RectanglePackingProblemAnnealerSoft])
+def test_annealer_cache(annealer, example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    init_state = list(range(problem.n)) + list(reversed(range(problem.n))) + [0] * problem.n
+
+    results = []
+    for cache_size in [0, 50]:
+        rpp = annealer(state=init_state, problem=problem, width_limit=15.0, height_limit=15.0, cache_size=cache_size)
+        rpp.copy_strategy = "slice"
+        rpp.set_schedule({"tmax": 100.0, "tmin": 1.0, "steps": 2000, "updates": 0})
+        random.seed(1)
+        results.append(rpp.anneal())
+
+    # The cache does not change the annealing
+    assert results[0] == results[1]
+
+    cache_info = rpp.cache_info()
+    assert 0 < cache_info["hits"]
+    assert cache_info["hits"] + cache_info["misses"] == rpp._evaluations
+    assert cache_info["size"] == cache_info["maxsize"] == 50
+    assert cache_info["evictions"] == cache_info["misses"] - 50
+
+    # Rotations are toggled, so that a rectangle rotated twice is the same state and hits the cache
+    assert all([r in (0, 1) for r in rpp.state[2 * problem.n :]])
+    rpp = annealer(state=init_state, problem=problem, cache_size=50)
+    rpp.copy_strategy = "slice"
+    rpp.energy()
+    for _ in range(2):
+        rpp._rotate_rectangle(3)
+        rpp._evaluate(move={"gp_range": None, "gn_range": None, "rotated": (3,)})
+        rpp._commit()
+    assert rpp.state == init_state
+    assert rpp.cache_info()["hits"] == 1
+
+    # The candidate found in the cache is evaluated by the decoder when it is committed
+    committed = dict(rpp._decoder._committed)
+    rpp._decoder.reset(*rpp.retrieve_pairs(n=problem.n, state=rpp.state))
+    for key in ["index_p", "index_n", "width", "height", "dist_h", "dist_v", "bounding_box"]:
+        assert committed[key] == rpp._decoder._committed[key]
+
+    with pytest.raises(ValueError):
+        annealer(state=init_state, problem=problem, cache_size=-1)
+
+
+def test_solver_cache(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solution = rps.Solver().solve(
+        problem=problem, simanneal_minutes=0.01, simanneal_steps=50, cache_size=100, stats=True
+    )
+    assert solution.stats["chains"][0]["cache"]["maxsize"] == 100
+
+    solution = rps.Solver().solve(problem=problem, simanneal_minutes=0.01, simanneal_steps=50, cache_size=100)
+    assert solution.stats is None
+    with pytest.raises(ValueError):
+        rps.Solver().solve(problem=problem, cache_size=-1)
+
+
+def test_annealer_anneal_after_auto(example_large_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_large_problem)
+    init_state = list(range(problem.n)) + list(reversed(range(problem.n))) + [0] * problem.n
+
+    def decoded_area(state):  # type: ignore
+        gp, gn, rotations = RectanglePackingProblemAnnealer.retrieve_pairs(n=problem.n, state=state)
+        return rps.SequencePair(pair=(gp, gn)).decode(problem=problem, rotations=rotations).area
+
+    for seed in range(5):
+        random.seed(seed)
+        errors = []
+
+        def progress_callback(step, total, temperature, energy, best_energy):  # type: ignore
+            errors.append(energy - decoded_area(rpp.state))
+
+        rpp = RectanglePackingProblemAnnealerHard(
+            state=init_state[:], problem=problem, progress_callback=progress_callback
+        )
+        rpp.copy_strategy = "slice"
+        schedule = rpp.auto(minutes=0.001, steps=20)
+
+        # The last move of auto() is accepted, and simanneal keeps the moved state
+        rpp.move()
+        rpp.set_schedule(dict(schedule, steps=50))
+        best_state, best_energy = rpp.anneal()
+
+        # The energies are consistent with the states in every step
+        assert errors == pytest.approx([0.0] * 51)
+        assert best_energy == pytest.approx(decoded_area(best_state))
+
+
+def test_annealer_strategy_hooks(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    rpp = RectanglePackingProblemAnnealer(state=[0, 1, 2, 3, 0, 1, 2, 3, 0, 0, 0, 0], problem=problem)
+    with pytest.raises(NotImplementedError) as e:
+        rpp.energy()
+    assert "RectanglePackingProblemAnnealer must implement _evaluate." in str(e.value)
+    with pytest.raises(NotImplementedError) as e:
+        rpp._apply_move()
+    assert "RectanglePackingProblemAnnealer must implement _apply_move." in str(e.value)
+
+
+def test_annealer_run_at_temperature(example_large_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_large_problem)
+    init_state = list(range(problem.n)) + list(reversed(range(problem.n))) + [0] * problem.n
+    rpp = RectanglePackingProblemAnnealerSoft(state=init_state, problem=problem, width_limit=300.0, height_limit=300.0)
+    rpp.copy_strategy = "slice"
+    init_energy = rpp.energy()
+
+    random.seed(1)
+    assert len(rpp.sample_energy_deltas(n_samples=10)) == 10
+    assert rpp.state == init_state
+
+    best_state, best_energy = rpp.run_at_temperature(temperature=100.0, steps=100)
+    assert best_energy <= init_energy
+    assert rpp.state != init_state
+
+    # Energies are consistent with the decoded states
+    gp, gn, rotations = rpp.retrieve_pairs(n=problem.n, state=best_state)
+    floorplan = rps.SequencePair(pair=(gp, gn)).decode(problem=problem, rotations=rotations)
+    assert floorplan.area == best_energy
+
+
+def test_annealer_estimate_schedule(example_large_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_large_problem)
+    init_state = list(range(problem.n)) + list(reversed(range(problem.n))) + [0] * problem.n
+    rpp = RectanglePackingProblemAnnealerSoft(state=init_state, problem=problem, width_limit=300.0, height_limit=300.0)
+    rpp.copy_strategy = "slice"
+
+    random.seed(1)
+    schedule = rpp.estimate_schedule(minutes=0.01, n_samples=50)
+    assert schedule["tmax"] > schedule["tmin"] > 0.0
+    assert schedule["speed"] > 0.0
+    assert rpp.state == init_state
+
+
+def test_solver_calibration(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    rps.Solver.clear_schedule_cache()
+
+    solution = rps.Solver().solve(problem=problem, simanneal_minutes=0.01, stats=True)
+    chain = solution.stats["chains"][0]
+    assert chain["schedule_cached"] is False
+    assert 0.0 < chain["calibration_time"]
+    assert 0.0 <= chain["annealing_time"]
+    assert 0 < chain["trials"]["moves"] <= chain["trials"]["trials"]
+
+    # The schedule is reused for the same problem
+    solution = rps.Solver().solve(problem=problem, simanneal_minutes=0.01, stats=True)
+    assert solution.stats["chains"][0]["schedule_cached"] is True
+
+    solution = rps.Solver().solve(problem=problem, simanneal_minutes=0.01, calibration="auto", stats=True)
+    assert solution.stats["chains"][0]["schedule_cached"] is False
+
+    with pytest.raises(ValueError):
+        rps.Solver().solve(problem=problem, calibration="unknown")
+
+
+def test_solver_stats(example_problem):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solution = rps.Solver().solve(
+        problem=problem, simanneal_minutes=0.01, simanneal_steps=50, n_workers=1, n_restarts=2, stats=True
+    )
+    for chain in solution.stats["chains"]:
+        assert 0 < chain["evaluations"]
+        assert chain["accepted"] + chain["rejected"] == chain["schedule"]["steps"]
+        assert chain["improving"] <= chain["accepted"]
+        assert chain["schedule"]["final_temperature"] == pytest.approx(chain["schedule"]["tmin"])
+        assert 0.0 < chain["decode_time"]
+        assert chain["hard_rejection_time"] == 0.0
+
+    totals = solution.stats["totals"]
+    for key in ["evaluations", "accepted", "rejected", "improving", "decode_time"]:
+        assert totals[key] == pytest.approx(sum(c[key] for c in solution.stats["chains"]))
+    assert 0.0 < solution.stats["elapsed"]
+
+    # The counters of the hard strategy
+    solution = rps.Solver().solve(
+        problem=problem, width_limit=6.5, simanneal_minutes=0.01, simanneal_steps=50, stats=True
+    )
+    chain = solution.stats["chains"][0]
+    assert chain["accepted"] + chain["rejected"] == chain["schedule"]["steps"]
+    assert 0.0 <= chain["hard_rejection_time"]
+
+
 ################################################################
 # Random seed
 ################################################################
@@ -13,6 +13,9 @@
 # limitations under the License.
 
 import mimetypes
+import xml.etree.ElementTree as ET
+
+import pytest
 
 import rectangle_packing_solver as rps
 from tests.example_data import example_problem  # noqa: F401
@@ -27,3 +30,107 @@ def test_visualizer(example_problem):  # noqa: F811
 
     mimetype = mimetypes.guess_type("./floorplan.png")[0]
     assert mimetype == "image/png"
+
+
+def test_visualizer_labels(example_problem, tmpdir):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    seqpair = rps.SequencePair(pair=([0, 1, 3, 2], [3, 0, 2, 1]))
+    solution = rps.Solution(sequence_pair=seqpair, floorplan=seqpair.decode(problem=problem))
+
+    for labels in [None, True, False]:
+        path = str(tmpdir.join(f"floorplan_{labels}.png"))
+        rps.Visualizer().visualize(solution=solution, path=path, labels=labels)
+        assert mimetypes.guess_type(path)[0] == "image/png"
+
+    with pytest.raises(TypeError):
+        rps.Visualizer().visualize(solution=None)
+
+
+def test_visualizer_svg(example_problem, tmpdir):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    seqpair = rps.SequencePair(pair=([0, 1, 3, 2], [3, 0, 2, 1]))
+    solution = rps.Solution(sequence_pair=seqpair, floorplan=seqpair.decode(problem=problem))
+
+    namespace = "{http://www.w3.org/2000/svg}"
+    root = ET.fromstring(rps.Visualizer().to_svg(solution=solution, title="A & B", width=400))
+    assert float(root.get("width")) == 420.0
+    assert root.find(namespace + "text").text == "A & B"
+    rects = root.findall(f"{namespace}g/{namespace}rect")
+    assert len(rects) == 4
+    assert [float(r.get("width")) for r in rects] == [200.0, 200.0, 105.0, 50.0]  # 50 pixels per unit
+    assert sorted([t.text for t in root.findall(f"{namespace}g/{namespace}text")]) == ["0", "1", "2", "3"]
+
+    # Labels which do not fit in rectangles are skipped
+    root = ET.fromstring(rps.Visualizer().to_svg(solution=solution, width=16))
+    assert root.findall(f"{namespace}g/{namespace}text") == []
+    root = ET.fromstring(rps.Visualizer().to_svg(solution=solution, width=16, labels=True))
+    assert len(root.findall(f"{namespace}g/{namespace}text")) == 4
+    root = ET.fromstring(rps.Visualizer().to_svg(solution=solution, labels=False))
+    assert root.findall(f"{namespace}g/{namespace}text") == []
+
+    path = str(tmpdir.join("floorplan.svg"))
+    rps.Visualizer().save_svg(solution=solution, path=path)
+    assert mimetypes.guess_type(path)[0] == "image/svg+xml"
+    ET.parse(path)
+
+    with pytest.raises(TypeError):
+        rps.Visualizer().to_svg(solution=None)
+    with pytest.raises(ValueError):
+        rps.Visualizer().to_svg(solution=solution, width=0)
+
+
+def test_visualizer_render_many(example_problem, tmpdir):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solutions = [rps.Solver().solve(problem=problem, simanneal_minutes=0.001, seed=seed) for seed in range(4)]
+    paths = [str(tmpdir.join(f"floorplan_{i}.png")) for i in range(4)]
+
+    for n_workers in [1, 2]:
+        results = list(rps.Visualizer().render_many(solutions, paths, n_workers=n_workers, max_pending=1))
+        assert sorted(results) == list(enumerate(paths))
+        assert all([mimetypes.guess_type(path)[0] == "image/png" for path in paths])
+
+    with pytest.raises(ValueError):
+        list(rps.Visualizer().render_many(solutions, paths[:3]))
+    with pytest.raises(ValueError):
+        list(rps.Visualizer().render_many(solutions, paths, n_workers=0))
+
+
+def test_render_queue(example_problem, tmpdir):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solution = rps.Solver().solve(problem=problem, simanneal_minutes=0.001)
+
+    with rps.RenderQueue(n_workers=1) as queue:
+        futures = [queue.submit(solution, path=str(tmpdir.join(f"floorplan_{i}.png"))) for i in range(3)]
+        assert [f.result() for f in futures] == [str(tmpdir.join(f"floorplan_{i}.png")) for i in range(3)]
+
+    with pytest.raises(ValueError):
+        rps.RenderQueue(n_workers=0)
+
+
+def test_visualizer_pdf_and_atlas(example_problem, tmpdir):  # noqa: F811
+    problem = rps.Problem(rectangles=example_problem)
+    solutions = [rps.Solver().solve(problem=problem, simanneal_minutes=0.001, seed=seed) for seed in range(5)]
+
+    path = str(tmpdir.join("floorplans.pdf"))
+    assert rps.Visualizer().save_pdf(solutions, path=path) == 5
+    with open(path, "rb") as f:
+        content = f.read()
+    assert content.startswith(b"%PDF")
+    assert b"/Count 5" in content  # Pages
+
+    path = str(tmpdir.join("floorplans.png"))
+    assert rps.Visualizer().save_atlas(solutions, path=path, cell_size=2.0) == 5
+    assert mimetypes.guess_type(path)[0] == "image/png"
+
+    # 3 x 2 cells of 200 pixels
+    path = str(tmpdir.join("floorplans.svg"))
+    assert rps.Visualizer().save_atlas(solutions, path=path, columns=3, cell_size=2.0, titles="ABCDE") == 5
+    root = ET.parse(path).getroot()
+    assert (float(root.get("width")), float(root.get("height"))) == (600.0, 400.0)
+    namespace = "{http://www.w3.org/2000/svg}"
+    assert [t.text for t in root.findall(f"{namespace}svg/{namespace}text")] == list("ABCDE")
+
+    with pytest.raises(ValueError):
+        rps.Visualizer().save_atlas([], path=path)
+    with pytest.raises(ValueError):
+        rps.Visualizer().save_atlas(solutions, path=path, titles=["A"])